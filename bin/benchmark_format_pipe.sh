@@ -0,0 +1,70 @@
+#!/bin/bash
+# Peak memory and latency benchmark for "clouds format --pipe".
+# Generates templates of increasing size and compares the streaming pipe mode
+# with rendering the whole output before writing it (the former behaviour).
+# Usage: bin/benchmark_format_pipe.sh [number of resources ...]
+
+python - "${@:-1000 10000 40000}" <<'PYTHON'
+import json
+import subprocess
+import sys
+from time import perf_counter
+
+MODES = {
+    "buffered": "print(dump_json(json.loads(sys.stdin.read())))",
+    "streaming": "sys.argv = ['clouds', 'format', '--pipe']\n"
+                 "try:\n    main()\nexcept SystemExit:\n    pass",
+}
+PROBE = """
+import json, resource, sys
+from clouds_aws import main
+from clouds_aws.local_stack.helpers import dump_json
+%s
+sys.stdout.flush()
+sys.stderr.write(str(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+"""
+
+
+def template(resources):
+    """ Return generated template text with a number of resources """
+    return json.dumps({
+        "AWSTemplateFormatVersion": "2010-09-09",
+        "Resources": {
+            "Queue%d" % num: {
+                "Type": "AWS::SQS::Queue",
+                "Properties": {
+                    "QueueName": {"Fn::Sub": "${AWS::StackName}-%d" % num},
+                    "RedrivePolicy": {"deadLetterTargetArn": {"Fn::GetAtt": ["Dlq", "Arn"]},
+                                      "maxReceiveCount": 5},
+                    "Tags": [{"Key": "Name", "Value": "queue-%d" % num},
+                             {"Key": "Stack", "Value": {"Ref": "AWS::StackName"}}],
+                },
+            } for num in range(resources)
+        },
+    })
+
+
+def run(mode, data):
+    """ Return time to first byte, total time and peak RSS (KiB) of one run """
+    start = perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", PROBE % MODES[mode]], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    proc.stdin.write(data)
+    proc.stdin.close()
+    proc.stdout.read(1)
+    first_byte = perf_counter() - start
+    proc.stdout.read()
+    peak = int(proc.stderr.read() or 0)
+    proc.wait()
+    return first_byte, perf_counter() - start, peak
+
+
+print("%9s %9s %10s %12s %10s %12s" % ("resources", "input", "mode", "first byte", "total",
+                                       "peak RSS"))
+for resources in (int(arg) for arg in sys.argv[1:]):
+    data = template(resources).encode("utf-8")
+    for mode in MODES:
+        first_byte, total, peak = run(mode, data)
+        print("%9d %7.1fMB %10s %10.0fms %8.0fms %10.1fMB" % (
+            resources, len(data) / 2 ** 20, mode, first_byte * 1000, total * 1000, peak / 1024))
+PYTHON
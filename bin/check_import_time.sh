@@ -0,0 +1,40 @@
+#!/bin/bash
+# Startup time benchmark for commands that must not load AWS/YAML libraries.
+# Run this before committing changes to imports. Fails if one of the checked
+# commands imports a heavy module.
+
+RUNS=${RUNS:-5}
+
+python - "${RUNS}" <<'PYTHON'
+import subprocess
+import sys
+from time import perf_counter
+
+HEAVY_MODULES = ("boto3", "botocore", "ruamel", "tabulate")
+COMMANDS = (
+    ["--help"],
+    ["format", "--pipe"],
+)
+PROBE = """
+import argparse, sys
+from clouds_aws.cli import add_parsers
+parser = argparse.ArgumentParser()
+add_parsers(parser, parser.add_subparsers(dest="command"), sys.argv[1:])
+print(",".join(sorted({name.split(".")[0] for name in sys.modules} & set(%r))))
+""" % (HEAVY_MODULES,)
+
+runs = int(sys.argv[1])
+result = 0
+for command in COMMANDS:
+    start = perf_counter()
+    for _ in range(runs):
+        loaded = subprocess.run([sys.executable, "-c", PROBE] + command, check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout.strip()
+    elapsed = (perf_counter() - start) / runs
+    print("clouds %-15s %7.1f ms  heavy modules: %s" % (" ".join(command), elapsed * 1000,
+                                                       loaded or "none"))
+    if loaded:
+        result = 1
+
+sys.exit(result)
+PYTHON
@@ -4,3 +4,4 @@
 
 PY_FILES=$(find src -name \*.py -not -path ./virtualenv/\* -not -path ./.vscode/\*)
 pylint ${PY_FILES}
+bash "$(dirname "$0")/check_import_time.sh"
@@ -59,7 +59,11 @@ Clouds-aws is also suitable for usage in automation.""",
     install_requires=(
         'boto3',
         'ruamel.yaml',
-        'scandir',
+        'scandir; python_version < "3.5"',
         'tabulate',
-    )
+    ),
+    extras_require={
+        'async': ['aiobotocore'],
+        'test': ['moto', 'pytest'],
+    }
 )
@@ -2,10 +2,10 @@
 
 import argparse
 import logging
+import os
+import sys
 
-from botocore.exceptions import ClientError
-
-from .cli import add_parsers
+from .cli import add_parsers, is_multiple
 
 LOG = logging.getLogger('clouds-aws')
 
@@ -22,16 +22,44 @@ def main():
     parser.add_argument('-d', '--debug', action='store_true', help='loglevel: debug')
     parser.add_argument('-f', '--force', action='store_true',
                         help='force action (use as global flag deprecated)')
-    parser.add_argument('-r', '--region', help='specify region (default: use environment)',
+    parser.add_argument('-r', '--region',
+                        help='specify region, list, or glob (default: use environment)',
                         nargs='?', default=None)
-    parser.add_argument('-p', '--profile', help='use AWS config profile (default: use environment)',
+    parser.add_argument('-p', '--profile',
+                        help='use AWS config profile, list, or glob (default: use environment)',
                         nargs='?', default=None)
     parser.add_argument('-v', '--verbose', action='store_true', help='loglevel: info')
+    parser.add_argument('--template-bucket', default=os.environ.get('CLOUDS_AWS_TEMPLATE_BUCKET'),
+                        help='S3 bucket templates too large to be sent inline are uploaded to '
+                             '(default: $CLOUDS_AWS_TEMPLATE_BUCKET)')
+    parser.add_argument('--template-prefix', default=os.environ.get('CLOUDS_AWS_TEMPLATE_PREFIX'),
+                        help='key prefix of uploaded templates (default: '
+                             '$CLOUDS_AWS_TEMPLATE_PREFIX or clouds-aws/templates)')
+    parser.add_argument('--minify', action='store_true',
+                        default=os.environ.get('CLOUDS_AWS_MINIFY', '') not in ('', '0'),
+                        help='send templates as compact JSON (YAML only if lossless, default: '
+                             '$CLOUDS_AWS_MINIFY)')
+    parser.add_argument('-o', '--output', choices=('table', 'ndjson'), default='table',
+                        help='output format, ndjson prints one JSON record per line as soon as '
+                             'it is fetched (describe, list, events, change describe)')
 
     # add command parser
-    add_parsers(subparsers)
+    add_parsers(parser, subparsers, sys.argv[1:])
 
     args = parser.parse_args()
+    if not hasattr(args, "func"):
+        parser.error("unable to determine command")
+
+    if not getattr(args, "fan_out", False) and (is_multiple(args.region) or
+                                                 is_multiple(args.profile)):
+        parser.error("several regions or profiles are only supported by list, describe and dump")
+
+    if args.output == 'ndjson' and not getattr(args, "ndjson", False):
+        parser.error("--output ndjson is only supported by describe, list, events and "
+                     "change describe")
+
+    if args.template_bucket or args.template_prefix or args.minify:
+        configure_templates(args)
 
     # set log level
     if args.verbose:
@@ -43,6 +71,31 @@ def main():
 
     try:
         args.func(args)
-    except ClientError as err:
+    except Exception as err:  # pylint: disable=broad-except
+        if not is_client_error(err):
+            raise
         LOG.error(err)
         exit(1)
+
+
+def configure_templates(args):
+    """
+    Configure how templates are sent to the API
+    Imported only if configured as the modules pull in boto3 and ruamel.yaml.
+    :param args: parser arguments
+    :return:
+    """
+    from clouds_aws.remote_stack import template_upload, wire_format  # pylint: disable=import-outside-toplevel
+
+    template_upload.configure(args.template_bucket, args.template_prefix)
+    wire_format.configure(args.minify)
+
+
+def is_client_error(err):
+    """
+    Return true if err is a botocore ClientError (without importing botocore)
+    :param err: exception
+    :return:
+    """
+    exceptions = sys.modules.get("botocore.exceptions")
+    return exceptions is not None and isinstance(err, exceptions.ClientError)
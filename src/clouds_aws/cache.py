@@ -0,0 +1,16 @@
+""" Local cache directory """
+
+from os import environ, makedirs, path
+
+
+def cache_path(*parts):
+    """
+    Return path inside the user's cache directory (parent directories are created)
+    The cache lives in $XDG_CACHE_HOME/clouds-aws (default: ~/.cache/clouds-aws).
+    :param parts: path components below the cache directory
+    :return:
+    """
+    base = environ.get("XDG_CACHE_HOME") or path.join(path.expanduser("~"), ".cache")
+    cache_file = path.join(base, "clouds-aws", *parts)
+    makedirs(path.dirname(cache_file), exist_ok=True)
+    return cache_file
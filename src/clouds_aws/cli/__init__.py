@@ -1,32 +1,76 @@
 """ Load command interpreter """
 
-import clouds_aws.cli.change
-import clouds_aws.cli.clone
-import clouds_aws.cli.console
-import clouds_aws.cli.delete
-import clouds_aws.cli.describe
-import clouds_aws.cli.dump
-import clouds_aws.cli.events
-import clouds_aws.cli.format
-import clouds_aws.cli.list
-import clouds_aws.cli.update
-import clouds_aws.cli.validate
+from importlib import import_module
 
+# command name: help text
+# Command modules are imported only for the command that is actually run
+# as they pull in heavy dependencies (boto3, ruamel.yaml, tabulate).
+COMMANDS = {
+    "apply": "update several stacks in AWS in dependency order",
+    "change": "use change sets to manipulate stacks in AWS",
+    "clone": "clone a stack in the current directory",
+    "console": "get web console login URL",
+    "delete": "delete a stack in AWS",
+    "describe": "output parameters, outputs, and resources of a stack in AWS",
+    "diff": "compare local stacks with stacks in AWS",
+    "dump": "dump a stack in AWS to current directory",
+    "events": "output all events of a stack",
+    "format": "normalize stack template(s) (for better diffs)",
+    "list": "list available stacks",
+    "status": "compare local stacks with AWS in one sweep",
+    "update": "update stack in AWS",
+    "validate": "validate stack template",
+}
 
-def add_parsers(subparsers):
+
+def add_parsers(parser, subparsers, argv):
     """
     Add command parser to argument parser
+    :param parser: main argument parser (global options must be added already)
     :param subparsers: argparse subparsers
+    :param argv: command line arguments (used to detect the selected command)
+    :return:
+    """
+    command = selected_command(argv, value_options(parser))
+
+    for name, help_text in COMMANDS.items():
+        if name == command:
+            import_module("clouds_aws.cli.%s" % name).add_parser(subparsers)
+        else:
+            subparsers.add_parser(name, help=help_text)
+
+
+def is_multiple(pattern):
+    """
+    Return true if a --region/--profile value may name more than one region/profile
+    :param pattern: comma separated names or globs (None: use environment)
+    :return:
+    """
+    return pattern is not None and any(char in pattern for char in ",*?[")
+
+
+def value_options(parser):
+    """
+    Return option strings of the global options that take a value
+    :param parser: argument parser
+    :return: set of option strings
+    """
+    # argparse has no public accessor for the options of a parser
+    return {option for action in parser._actions  # pylint: disable=protected-access
+            if action.nargs != 0 for option in action.option_strings}
+
+
+def selected_command(argv, options):
+    """
+    Return name of the command given on the command line (None if there is none)
+    :param argv: command line arguments
+    :param options: option strings of global options taking a value (skipped with their value)
     :return:
     """
-    clouds_aws.cli.change.add_parser(subparsers)
-    clouds_aws.cli.clone.add_parser(subparsers)
-    clouds_aws.cli.console.add_parser(subparsers)
-    clouds_aws.cli.delete.add_parser(subparsers)
-    clouds_aws.cli.describe.add_parser(subparsers)
-    clouds_aws.cli.dump.add_parser(subparsers)
-    clouds_aws.cli.events.add_parser(subparsers)
-    clouds_aws.cli.format.add_parser(subparsers)
-    clouds_aws.cli.list.add_parser(subparsers)
-    clouds_aws.cli.update.add_parser(subparsers)
-    clouds_aws.cli.validate.add_parser(subparsers)
+    args = iter(argv)
+    for arg in args:
+        if arg in options:
+            next(args, None)
+        elif arg in COMMANDS:
+            return arg
+    return None
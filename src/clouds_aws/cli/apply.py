@@ -0,0 +1,182 @@
+""" Command parser definition """
+
+import logging
+
+from botocore.exceptions import ClientError
+
+from clouds_aws.cli.common import load_local_stack
+from clouds_aws.local_stack import list_stacks as local_stacks
+from clouds_aws.local_stack.dependencies import DependencyError, dependency_graph, \
+    dependency_order
+from clouds_aws.local_stack.diff import stack_diff
+from clouds_aws.remote_stack import RemoteStack, RemoteStackError
+from clouds_aws.remote_stack.polling import PollingPolicy
+from clouds_aws.remote_stack.waiter import StackWaiter, WaitResult
+
+LOG = logging.getLogger(__name__)
+
+# status of stacks that did not need to be updated
+UNCHANGED = "UNCHANGED"
+
+# status of stacks not started before the timeout
+NOT_STARTED = "NOT_STARTED (timed out)"
+
+
+def add_parser(subparsers):
+    """
+    Add command subparser
+    :param subparsers:
+    :return:
+    """
+    parser = subparsers.add_parser('apply',
+                                   help='update several stacks in AWS in dependency order')
+    parser.add_argument('-c', '--create_missing', action='store_true',
+                        help='create stacks in AWS that do not exist')
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+                        help='number of stacks to update concurrently (default: 4)')
+    parser.add_argument('-t', '--timeout', type=int,
+                        help='give up waiting after this many seconds (default: wait forever)')
+    parser.add_argument('--no-diff', action='store_true',
+                        help='send updates without comparing with the stacks in AWS first')
+    parser.add_argument('stack', help='stacks to update (default: all local stacks)', nargs='*')
+    parser.set_defaults(func=cmd_apply)
+
+
+def cmd_apply(args):
+    """
+    Update local stacks in AWS, independent stacks concurrently
+    :param args:
+    :return:
+    """
+    stacks = {name: load_local_stack(name, round_trip=False)
+              for name in args.stack or local_stacks()}
+
+    try:
+        graph = dependency_graph(stacks)
+        order = dependency_order(graph)
+    except DependencyError as err:
+        LOG.error(err)
+        exit(1)
+
+    for name in order:
+        if graph[name]:
+            LOG.info("Stack %s depends on %s", name, ", ".join(sorted(graph[name])))
+
+    results = apply_stacks(args, stacks, graph, order)
+
+    failed = sorted(name for name, result in results.items() if not result.success)
+    for name in order:
+        result = results[name]
+        if result.success:
+            LOG.info("%s: %s", name, result.status)
+            continue
+
+        LOG.error("%s: %s", name, result.status)
+        for event in result.events:
+            if event["ResourceStatus"].endswith("FAILED"):
+                LOG.error("  %s: %s", event["LogicalResourceId"],
+                          event.get("ResourceStatusReason", ""))
+
+    if failed:
+        LOG.error("Failed to apply %d stack(s): %s", len(failed), ", ".join(failed))
+        exit(1)
+
+
+def apply_stacks(args, stacks, graph, order):
+    """
+    Update stacks as soon as all their dependencies are updated
+    The stacks being updated are watched by a single StackWaiter. No stacks are
+    started once the timeout has expired.
+    :param args: parser arguments
+    :param stacks: dict of stack name to LocalStack
+    :param graph: dependency graph (see dependency_graph)
+    :param order: stack names in dependency order
+    :return: dict of stack name to WaitResult
+    """
+    waiter = StackWaiter(args.region, args.profile, PollingPolicy(args.timeout))
+    existing = waiter.cfn.list_stacks()
+
+    pending = list(order)
+    results = {}
+
+    while pending or len(waiter):
+        if waiter.policy.expired():
+            for name in pending:
+                LOG.warning("Timed out before starting stack %s", name)
+                results[name] = WaitResult(name, NOT_STARTED, False, [])
+            pending = []
+
+        for name in list(pending):
+            if len(waiter) >= max(args.jobs, 1) or waiter.policy.expired():
+                break
+
+            deps = graph[name] & set(stacks)
+            if any(dep in results and not results[dep].success for dep in deps):
+                pending.remove(name)
+                results[name] = WaitResult(name, "SKIPPED (dependency failed)", False, [])
+            elif all(dep in results for dep in deps):
+                pending.remove(name)
+                result = start_stack(args, stacks[name], name in existing, waiter)
+                if result:
+                    results[name] = result
+
+        for result in waiter.wait_any():
+            LOG.info("Stack %s finished: %s", result.stack, result.status)
+            results[result.stack] = result
+
+    return results
+
+
+def start_stack(args, local_stack, exists, waiter):
+    """
+    Start update (or creation) of a stack and add it to the waiter
+    :param args: parser arguments
+    :param local_stack: LocalStack
+    :param exists: the stack exists in AWS
+    :type waiter: StackWaiter
+    :param waiter: waiter watching the stacks being updated
+    :return: WaitResult if the stack does not need to be waited for
+    """
+    remote_stack = RemoteStack(local_stack.name, args.region, args.profile)
+    try:
+        if exists and not args.no_diff and is_unchanged(local_stack, remote_stack):
+            LOG.info("Stack %s is identical, not updating", local_stack.name)
+            return WaitResult(local_stack.name, UNCHANGED, True, [])
+
+        if exists:
+            LOG.info("Updating stack %s", local_stack.name)
+            remote_stack.skip_events()
+            remote_stack.update(local_stack.template, local_stack.parameters)
+        elif args.create_missing:
+            LOG.info("Creating stack %s", local_stack.name)
+            remote_stack.create(local_stack.template, local_stack.parameters)
+        else:
+            return WaitResult(local_stack.name, "FAILED (does not exist, not creating without "
+                                                "--create_missing)", False, [])
+
+    except (ClientError, RemoteStackError) as err:
+        if "No updates are to be performed" in str(err):
+            LOG.info("No updates are to be performed on stack %s", local_stack.name)
+            return WaitResult(local_stack.name, UNCHANGED, True, [])
+        LOG.error("Failed to update stack %s: %s", local_stack.name, err)
+        return WaitResult(local_stack.name, "FAILED (%s)" % err, False, [])
+
+    except Exception as err:  # pylint: disable=broad-except
+        # e.g. a failed template upload, do not abandon the stacks already started
+        LOG.error("Failed to start stack %s: %s", local_stack.name, err)
+        return WaitResult(local_stack.name, "FAILED (%s)" % err, False, [])
+
+    waiter.add(remote_stack)
+    return None
+
+
+def is_unchanged(local_stack, remote_stack):
+    """
+    Return true if the stack in AWS equals the local stack
+    :param local_stack: LocalStack
+    :param remote_stack: RemoteStack
+    :return:
+    """
+    remote_stack.load(events=False, change_sets=False, resources=False)
+    return remote_stack.loaded and \
+        not stack_diff(local_stack, remote_stack.template, remote_stack.parameters)
@@ -1,19 +1,23 @@
 """ Command parser definition """
 
 import logging
-from time import sleep
 
 from botocore.exceptions import ClientError
 from tabulate import tabulate
 
-from clouds_aws.cli.common import load_local_stack
+from clouds_aws.cli.common import is_ndjson, load_local_stack, print_record
 from clouds_aws.cli.events import poll_events
 from clouds_aws.local_stack.helpers import dump_yaml, dump_json
-from clouds_aws.remote_stack import RemoteStack, list_stacks as remote_stacks
+from clouds_aws.remote_stack import RemoteStack, RemoteStackError, stack_exists
+from clouds_aws.remote_stack.aws_client import CloudFormationError
+from clouds_aws.remote_stack.polling import PollingPolicy, is_throttling
 from clouds_aws.remote_stack.change_set import ChangeSet
 
 LOG = logging.getLogger(__name__)
 
+# seconds to wait for a change set to be created
+CHANGE_SET_TIMEOUT = 600
+
 
 def add_parser(subparsers):
     """
@@ -31,6 +35,9 @@ def add_parser(subparsers):
     p_create.add_argument('-d', '--description', default="")
     p_create.add_argument('-q', '--quiet', action='store_true',
                           help='do not output change set details')
+    p_create.add_argument('-t', '--timeout', type=int, default=CHANGE_SET_TIMEOUT,
+                          help='give up waiting for the change set after this many seconds '
+                               '(default: %d)' % CHANGE_SET_TIMEOUT)
     p_create.add_argument('stack', help="stack name")
     p_create.add_argument('name', help="change set name")
     p_create.set_defaults(func=cmd_create)
@@ -44,7 +51,7 @@ def add_parser(subparsers):
     p_describe.add_argument('name', help="change set name")
     p_describe.add_argument('--json', help="output as json", action='store_true')
     p_describe.add_argument('--yaml', help="output as yaml", action='store_true')
-    p_describe.set_defaults(func=cmd_describe)
+    p_describe.set_defaults(func=cmd_describe, ndjson=True)
 
     p_execute = subparsers.add_parser('execute', help='execute a change set')
     p_execute.add_argument('stack', help="stack name")
@@ -54,6 +61,8 @@ def add_parser(subparsers):
                                 'implies --wait)')
     p_execute.add_argument('-w', '--wait', action='store_true',
                            help='wait for update to finish (synchronous mode)')
+    p_execute.add_argument('-t', '--timeout', type=int,
+                           help='give up waiting after this many seconds (default: wait forever)')
     p_execute.set_defaults(func=cmd_execute)
 
     p_delete = subparsers.add_parser('delete', help='delete a change set')
@@ -68,13 +77,12 @@ def cmd_create(args):
     :param args: parser arguments
     :return:
     """
-    local_stack = load_local_stack(args.stack)
+    local_stack = load_local_stack(args.stack, round_trip=False)
     remote_stack = RemoteStack(args.stack, args.region, args.profile)
 
     try:
-        if args.stack in remote_stacks(args.region, args.profile):
-            remote_stack.load()
-            if args.name in remote_stack.change_sets:
+        if stack_exists(args.stack, args.region, args.profile):
+            if remote_stack.has_change_set(args.name):
                 LOG.warning("Change set %s already exists.", args.name)
                 exit(1)
 
@@ -86,25 +94,53 @@ def cmd_create(args):
         change_set.create(local_stack.template, local_stack.parameters, args.description)
 
         if not args.quiet:
-            loop = 0
-            while True and loop < 10:
-                change_set.load()
-                if change_set.change["Status"] == "CREATE_COMPLETE":
-                    break
-
-                if change_set.change["Status"] == "FAILED":
-                    LOG.error("Failed to create change set.")
-                    exit(1)
-
-                # poll for completion
-                sleep(3)
-                loop += 1
-
+            wait_for_change_set(change_set, PollingPolicy(args.timeout))
             cmd_describe(args)
 
     except ClientError as err:
         raise err
 
+    except CloudFormationError as err:
+        LOG.error(err)
+        exit(1)
+
+
+def wait_for_change_set(change_set, policy):
+    """
+    Wait for a change set to be created (exits on failure)
+    :type change_set: ChangeSet
+    :param change_set: change set being created
+    :type policy: PollingPolicy
+    :param policy: polling policy
+    :return:
+    """
+    status = None
+    while True:
+        # checked first, so the timeout applies under sustained throttling, too
+        if policy.expired():
+            LOG.error("Timed out waiting for change set (%s)", status)
+            exit(1)
+
+        try:
+            change_set.load()
+        except ClientError as err:
+            if not is_throttling(err):
+                raise err
+            policy.throttled()
+            policy.sleep()
+            continue
+
+        changed = change_set.change["Status"] != status
+        status = change_set.change["Status"]
+        if status == "CREATE_COMPLETE":
+            return
+
+        if status == "FAILED":
+            LOG.error("Failed to create change set.")
+            exit(1)
+
+        policy.sleep(changed)
+
 
 def cmd_list(args):
     """
@@ -115,7 +151,7 @@ def cmd_list(args):
     remote_stack = RemoteStack(args.stack, args.region, args.profile)
 
     try:
-        remote_stack.load()
+        remote_stack.load(template=False, events=False, resources=False)
         if remote_stack.change_sets:
             print(tabulate(remote_stack.change_sets.values(), ("Name", "Description", "Status")))
 
@@ -130,7 +166,15 @@ def cmd_describe(args):
     :return:
     """
     remote_stack = RemoteStack(args.stack, args.region, args.profile)
-    remote_stack.load()
+
+    if is_ndjson(args):
+        # stream changes page by page as they are fetched
+        for page in remote_stack.cfn.iter_change_set_pages(args.stack, args.name):
+            for change in page.get("Changes", []):
+                print_record(change)
+        return
+
+    remote_stack.load(template=False, events=False, change_sets=False, resources=False)
 
     try:
         if args.json:
@@ -154,13 +198,20 @@ def cmd_execute(args):
     :return:
     """
     remote_stack = RemoteStack(args.stack, args.region, args.profile)
-    remote_stack.load()
+    try:
+        remote_stack.skip_events()
+    except RemoteStackError as err:
+        LOG.error(err)
+        exit(1)
     change = remote_stack.get_change_set(args.name)
     change.execute()
 
     # poll until stable state is reached
     if args.events or args.wait:
-        poll_events(remote_stack, args.events)
+        result = poll_events(remote_stack, args.events, timeout=args.timeout)
+        if not result.success:
+            LOG.error("Failed to execute change set %s: %s", args.name, result.status)
+            exit(1)
 
 
 def cmd_delete(args):
@@ -170,6 +221,6 @@ def cmd_delete(args):
     :return:
     """
     remote_stack = RemoteStack(args.stack, args.region, args.profile)
-    remote_stack.load()
+    remote_stack.load(template=False, events=False, change_sets=False, resources=False)
     change = remote_stack.get_change_set(args.name)
     change.delete()
@@ -1,18 +1,147 @@
 """ Common CLI functions """
+import json
 import logging
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import BotoCoreError, ClientError
 
 from clouds_aws.local_stack import LocalStack, LocalStackError
+from clouds_aws.remote_stack.aws_client import CloudFormationError
+from clouds_aws.cli import is_multiple
+from clouds_aws.remote_stack.sessions import expand_profiles, expand_regions, get_session
 
 LOG = logging.getLogger(__name__)
 
+# maximum number of regions/profiles queried at the same time
+FAN_OUT_JOBS = 16
+
+# --output value for one JSON record per line
+NDJSON = "ndjson"
+
+
+def add_cache_arguments(parser):
+    """
+    Add arguments for serving remote stack metadata from the local cache
+    :param parser: command parser
+    :return:
+    """
+    parser.add_argument("--cached", action="store_true",
+                        help="serve from local cache only, without accessing AWS")
+    parser.add_argument("--max-age", type=int, metavar="SECONDS",
+                        help="serve from local cache if fetched less than SECONDS ago, "
+                             "revalidate otherwise")
+
+
+def add_async_arguments(parser):
+    """
+    Add arguments for running API calls on the asyncio backend
+    :param parser: command parser
+    :return:
+    """
+    parser.add_argument("--async", action="store_true", dest="use_async",
+                        help="run API calls concurrently on asyncio (requires aiobotocore)")
+    parser.add_argument("--concurrency", type=int, default=64, metavar="N",
+                        help="maximum number of API requests in flight with --async "
+                             "(default: 64)")
+
+
+def call_many(args, calls):
+    """
+    Run API calls concurrently on the asyncio backend or bail out if it is unavailable
+    :param args: parser arguments (see add_async_arguments)
+    :param calls: list of (region, profile, AsyncCloudFormation method name, tuple of arguments)
+    :return: list of results (or raised exceptions) in order of the calls
+    """
+    from clouds_aws.remote_stack import async_client  # pylint: disable=import-outside-toplevel
+
+    try:
+        return async_client.call_many(calls, args.concurrency)
+    except async_client.AsyncUnavailable as err:
+        LOG.error(err)
+        exit(1)
+
+
+def prefetch(args, method, stacks):
+    """
+    Call an AsyncCloudFormation method for many stacks of one region and profile concurrently
+    :param args: parser arguments (see add_async_arguments)
+    :param method: AsyncCloudFormation method name
+    :param stacks: list of stack names
+    :return: function returning the result of a stack (or raising its error)
+    """
+    results = dict(zip(stacks, call_many(args, [(args.region, args.profile, method, (stack,))
+                                                for stack in stacks])))
+
+    def result(stack):
+        """ Return prefetched result of a stack """
+        if isinstance(results[stack], Exception):
+            raise results[stack]
+        return results[stack]
+
+    return result
+
+
+def is_cached(args):
+    """
+    Return true if the arguments request the metadata cache (see add_cache_arguments)
+    :param args: parser arguments
+    :return:
+    """
+    return args.cached or args.max_age is not None
+
+
+def metadata_cache(args, cfn):
+    """
+    Return MetadataCache if requested by the arguments (see add_cache_arguments)
+    :param args: parser arguments
+    :param cfn: CloudFormation client object
+    :return: MetadataCache or None
+    """
+    if not is_cached(args):
+        return None
+
+    from clouds_aws.remote_stack.metadata_cache import MetadataCache  # pylint: disable=import-outside-toplevel
+    return MetadataCache(cfn, max_age=args.max_age or 0, offline=args.cached)
+
+
+def is_ndjson(args):
+    """
+    Return true if records are to be printed as NDJSON (see print_record)
+    :param args: parser arguments
+    :return:
+    """
+    return getattr(args, "output", None) == NDJSON
+
+
+def print_record(record):
+    """
+    Print a record as a single line of JSON and flush it at once
+    :param record: dict
+    :return:
+    """
+    print(json.dumps(record, default=_json_default, sort_keys=True), flush=True)
 
-def load_local_stack(name):
+
+def _json_default(obj):
+    """
+    Serialize values unknown to json (timestamps of the API)
+    :param obj:
+    :return:
+    """
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def load_local_stack(name, round_trip=True):
     """
     Return loaded local stack or bail out
     :param name: stack name
+    :param round_trip: load parameters for saving them again
     :return:
     """
-    local_stack = LocalStack(name)
+    local_stack = LocalStack(name, round_trip)
     try:
         local_stack.load()
     except LocalStackError as err:
@@ -20,3 +149,83 @@ def load_local_stack(name):
         exit(1)
 
     return local_stack
+
+
+def targets(args):
+    """
+    Return (profile, region) pairs named by the --profile and --region arguments
+    Both may be comma separated lists of names or globs.
+    :param args: parser arguments
+    :return: list of tuples
+    """
+    return [(profile, region)
+            for profile in expand_profiles(args.profile)
+            for region in expand_regions(args.region, profile)]
+
+
+def is_fan_out(args):
+    """
+    Return true if the arguments name several regions or profiles
+    :param args: parser arguments
+    :return:
+    """
+    return is_multiple(args.profile) or is_multiple(args.region)
+
+
+def fan_out(args, func):
+    """
+    Call func for every region and profile concurrently
+    func is called with a copy of args naming a single region and profile.
+    Errors are returned, not raised.
+    :param args: parser arguments
+    :param func: function taking parser arguments
+    :return: list of (profile label, region label, result, error) in order of the targets
+    """
+    def call(profile, region):
+        target_args = Namespace(**dict(vars(args), profile=profile, region=region))
+        try:
+            return func(target_args), None
+        except (BotoCoreError, ClientError, CloudFormationError) as err:
+            return None, err
+
+    pairs = targets(args)
+    with ThreadPoolExecutor(max_workers=max(min(len(pairs), FAN_OUT_JOBS), 1)) as executor:
+        futures = [executor.submit(call, profile, region) for profile, region in pairs]
+        return [target_labels(profile, region) + future.result()
+                for (profile, region), future in zip(pairs, futures)]
+
+
+def fan_out_calls(args, method, *method_args):
+    """
+    Call an AsyncCloudFormation method for every region and profile on the asyncio backend
+    Errors are returned, not raised (like fan_out).
+    :param args: parser arguments (see add_async_arguments)
+    :param method: AsyncCloudFormation method name
+    :param method_args: method arguments
+    :return: list of (profile label, region label, result, error) in order of the targets
+    """
+    pairs = targets(args)
+    results = call_many(args, [(region, profile, method, method_args)
+                               for profile, region in pairs])
+
+    fanned_out = []
+    for (profile, region), result in zip(pairs, results):
+        if isinstance(result, (BotoCoreError, ClientError, CloudFormationError)):
+            fanned_out.append(target_labels(profile, region) + (None, result))
+        elif isinstance(result, Exception):
+            raise result
+        else:
+            fanned_out.append(target_labels(profile, region) + (result, None))
+
+    return fanned_out
+
+
+def target_labels(profile, region):
+    """
+    Return profile and region names used to tag output
+    :param profile: AWS config profile name (None: use environment)
+    :param region: AWS region (None: use environment)
+    :return: tuple of profile and region name
+    """
+    return (profile or "default",
+            region or get_session(profile).region_name or "default")
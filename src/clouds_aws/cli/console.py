@@ -5,7 +5,7 @@ import logging
 from urllib.parse import urlencode
 from urllib.request import urlopen
 
-import boto3
+from clouds_aws.remote_stack.sessions import get_session
 
 LOG = logging.getLogger(__name__)
 FEDERATION_URL = "https://signin.aws.amazon.com/federation?Action=getSigninToken&%s"
@@ -30,7 +30,7 @@ def cmd_login(args):
     :param args:
     :return:
     """
-    session = boto3.Session(profile_name=args.profile)
+    session = get_session(args.profile)
     creds = session.get_credentials()
     data = {
         "sessionId": creds.access_key,
@@ -3,7 +3,7 @@
 import logging
 
 from clouds_aws.cli.events import poll_events
-from clouds_aws.remote_stack import RemoteStack, list_stacks as remote_stacks
+from clouds_aws.remote_stack import RemoteStack, RemoteStackError, stack_exists
 
 LOG = logging.getLogger(__name__)
 
@@ -21,6 +21,8 @@ def add_parser(subparsers):
     parser.add_argument('-f', '--force', action='store_true', help='force deletion')
     parser.add_argument('-w', '--wait', action='store_true',
                         help='wait for deletion to finish (synchronous mode)')
+    parser.add_argument('-t', '--timeout', type=int,
+                        help='give up waiting after this many seconds (default: wait forever)')
     parser.add_argument('stack', help='stack to delete')
     parser.set_defaults(func=cmd_delete)
 
@@ -31,7 +33,7 @@ def cmd_delete(args):
     :param args:
     :return:
     """
-    if args.stack not in remote_stacks(args.region, args.profile):
+    if not stack_exists(args.stack, args.region, args.profile):
         LOG.warning("Stack %s does not exist", args.stack)
         exit(1)
 
@@ -40,9 +42,17 @@ def cmd_delete(args):
         exit(1)
 
     remote_stack = RemoteStack(args.stack, args.region, args.profile)
-    remote_stack.load()
-    remote_stack.delete()
+    try:
+        remote_stack.skip_events()
+        remote_stack.delete()
+    except RemoteStackError as err:
+        LOG.error(err)
+        exit(1)
 
     # poll until stable state is reached
     if args.events or args.wait:
-        poll_events(remote_stack, args.events)
+        result = poll_events(remote_stack, args.events, deleting=True,
+                             timeout=args.timeout)
+        if not result.success:
+            LOG.error("Failed to delete stack %s: %s", args.stack, result.status)
+            exit(1)
@@ -4,8 +4,10 @@ import logging
 
 from tabulate import tabulate
 
+from clouds_aws.cli.common import add_cache_arguments, fan_out, is_fan_out, is_ndjson, \
+    metadata_cache, print_record
 from clouds_aws.local_stack.helpers import dump_json, dump_yaml
-from clouds_aws.remote_stack import RemoteStack
+from clouds_aws.remote_stack.aws_client import CloudFormation, CloudFormationError
 
 LOG = logging.getLogger(__name__)
 
@@ -20,8 +22,9 @@ def add_parser(subparsers):
                                                     "resources of a stack in AWS")
     parser.add_argument("-j", "--json", action="store_true", help="output as JSON")
     parser.add_argument("-y", "--yaml", action="store_true", help="output as YAML")
+    add_cache_arguments(parser)
     parser.add_argument("stack", help="stack to describe")
-    parser.set_defaults(func=cmd_describe)
+    parser.set_defaults(func=cmd_describe, fan_out=True, ndjson=True)
 
 
 def cmd_describe(args):
@@ -30,36 +33,108 @@ def cmd_describe(args):
     :param args:
     :return:
     """
-    stack = RemoteStack(args.stack, args.region, args.profile)
-    stack.load()
-
-    if args.json:
-        print(dump_json({
-            "Parameters": stack.parameters,
-            "Outputs": stack.outputs,
-            "Resources": stack.resources
-        }))
-        return
+    if is_fan_out(args):
+        tags = ("Profile", "Region")
+        described = describe_targets(args)
+    else:
+        tags = ()
+        try:
+            if is_ndjson(args):
+                # stream details in the order they are fetched
+                for section, key, value in iter_stack_details(args):
+                    print_record({"Section": section, "Key": key, "Value": value})
+                return
+            described = [((), describe_stack(args))]
+        except CloudFormationError as err:
+            LOG.error(err)
+            exit(1)
 
-    if args.yaml:
-        print(dump_yaml({
-            "Parameters": stack.parameters,
-            "Outputs": stack.outputs,
-            "Resources": stack.resources
-        }))
-        return
+    if is_ndjson(args):
+        for tag, stack_data in described:
+            for section in ("Parameters", "Outputs", "Resources"):
+                for key, value in sorted(stack_data[section].items()):
+                    print_record(dict(zip(tags, tag), Section=section, Key=key, Value=value))
+    elif args.json or args.yaml:
+        records = [dict(zip(tags, tag), **stack_data) for tag, stack_data in described]
+        output = records if tags else records[0]
+        print(dump_json(output) if args.json else dump_yaml(output))
+    else:
+        print_tables(tags, described)
+
+
+def describe_targets(args):
+    """
+    Return details of the stack in every region and profile it exists in (exits if none)
+    :param args:
+    :return: list of ((profile, region), stack details)
+    """
+    described = []
+    for profile, region, stack_data, error in fan_out(args, describe_stack):
+        if error:
+            # the stack missing in some regions is expected, any other error is not
+            level = logging.INFO if "does not exist" in str(error) else logging.WARNING
+            LOG.log(level, "%s/%s: %s", profile, region, error)
+            continue
+        described.append(((profile, region), stack_data))
 
-    if stack.parameters:
-        print(tabulate(sorted(stack.parameters.items()), ("Parameter", "Value")))
+    if not described:
+        LOG.error("Stack %s not found in any region", args.stack)
+        exit(1)
+
+    return described
+
+
+def print_tables(tags, described):
+    """
+    Print parameters, outputs, and resources as tables
+    :param tags: headers of the columns identifying the target
+    :param described: list of (tag values, stack details)
+    :return:
+    """
+    parameters = [tag + item for tag, stack_data in described
+                  for item in sorted(stack_data["Parameters"].items())]
+    if parameters:
+        print(tabulate(parameters, tags + ("Parameter", "Value")))
         print()
 
-    if stack.outputs:
-        print(tabulate(sorted(stack.outputs.items()), ("Output", "Value")))
+    outputs = [tag + item for tag, stack_data in described
+               for item in sorted(stack_data["Outputs"].items())]
+    if outputs:
+        print(tabulate(outputs, tags + ("Output", "Value")))
         print()
 
     print(tabulate(
-        sorted([(key, val["ResourceType"], val["PhysicalResourceId"])
-                for key, val in stack.resources.items()]),
-        ("Resource", "Type", "PhysicalId")
+        [tag + resource for tag, stack_data in described
+         for resource in sorted((key, val["ResourceType"], val["PhysicalResourceId"])
+                                for key, val in stack_data["Resources"].items())],
+        tags + ("Resource", "Type", "PhysicalId")
     ))
     print()
+
+
+def describe_stack(args):
+    """
+    Return parameters, outputs, and resources of a stack in a single region and profile
+    :param args:
+    :return:
+    """
+    cfn = CloudFormation(args.region, args.profile)
+    return (metadata_cache(args, cfn) or cfn).describe_stack(args.stack)
+
+
+def iter_stack_details(args):
+    """
+    Yield (section, key, value) of a stack's parameters, outputs, and resources
+    :param args:
+    :return:
+    """
+    cfn = CloudFormation(args.region, args.profile)
+    cache = metadata_cache(args, cfn)
+    if not cache:
+        yield from cfn.iter_stack_details(args.stack)
+        return
+
+    stack_data = cache.describe_stack(args.stack)
+    for section in ("Parameters", "Outputs", "Resources"):
+        for key, value in sorted(stack_data[section].items()):
+            yield section, key, value
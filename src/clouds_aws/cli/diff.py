@@ -0,0 +1,84 @@
+""" Command parser definition """
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from clouds_aws.local_stack import LocalStack, LocalStackError
+from clouds_aws.local_stack import list_stacks as local_stacks
+from clouds_aws.local_stack.diff import format_change, stack_diff
+from clouds_aws.local_stack.helpers import YAMLLoadError
+from clouds_aws.remote_stack import RemoteStack
+
+LOG = logging.getLogger(__name__)
+
+
+def add_parser(subparsers):
+    """
+    Add command subparser
+    :param subparsers:
+    :return:
+    """
+    parser = subparsers.add_parser('diff', help='compare local stacks with stacks in AWS')
+    parser.add_argument('-a', '--all', action='store_true', help='compare all local stacks')
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+                        help='number of stacks to fetch concurrently (default: 4)')
+    parser.add_argument('stack', help='stack to compare', nargs='*')
+    parser.set_defaults(func=cmd_diff)
+
+
+def cmd_diff(args):
+    """
+    Print differences between local stacks and stacks in AWS
+    Exits with 1 if any stack differs (like diff).
+    :param args:
+    :return:
+    """
+    stacks = args.stack
+    if args.all:
+        stacks = sorted(local_stacks())
+
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        futures = [executor.submit(diff_stack, args, stack) for stack in stacks]
+
+        differing = []
+        for stack, future in zip(stacks, futures):
+            try:
+                changes = future.result()
+            except (ClientError, LocalStackError, ValueError, YAMLLoadError) as err:
+                LOG.error("Failed to compare stack %s: %s", stack, err)
+                differing.append(stack)
+                continue
+
+            if changes is None:
+                # not loaded, the error has been logged already
+                differing.append(stack)
+            elif changes:
+                print(stack)
+                for change in changes:
+                    print("  " + format_change(change))
+                differing.append(stack)
+            else:
+                LOG.info("Stack %s is identical", stack)
+
+    if differing:
+        exit(1)
+
+
+def diff_stack(args, stack):
+    """
+    Return differences between a local stack and the stack in AWS
+    :param args: parser arguments
+    :param stack: stack name
+    :raises LocalStackError: if the local stack cannot be loaded
+    :return: list of Change (None if the stack does not exist in AWS)
+    """
+    local_stack = LocalStack(stack, round_trip=False)
+    local_stack.load()
+    remote_stack = RemoteStack(stack, args.region, args.profile)
+    remote_stack.load(events=False, change_sets=False, resources=False)
+    if not remote_stack.loaded:
+        return None
+
+    return stack_diff(local_stack, remote_stack.template, remote_stack.parameters)
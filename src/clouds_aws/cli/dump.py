@@ -1,10 +1,17 @@
 """ Command parser definition """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os import path
+from time import time
 
-from clouds_aws.local_stack import LocalStack
-from clouds_aws.remote_stack import RemoteStack
-from clouds_aws.remote_stack.aws_client import CloudFormation
+from botocore.exceptions import ClientError
+
+from clouds_aws.cli.common import add_async_arguments, call_many, fan_out, is_fan_out
+from clouds_aws.local_stack import LocalStack, LocalStackError
+from clouds_aws.local_stack.template import TemplateError
+from clouds_aws.remote_stack import RemoteStack, RemoteStackError
+from clouds_aws.remote_stack.aws_client import CloudFormation, CloudFormationError
 
 LOG = logging.getLogger(__name__)
 
@@ -19,8 +26,11 @@ def add_parser(subparsers):
     parser.add_argument("-a", "--all", action="store_true", help="dump all stacks")
     parser.add_argument("-f", "--force", action="store_true",
                         help="overwrite existing local stack")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of stacks to dump concurrently (default: 1)")
+    add_async_arguments(parser)
     parser.add_argument("stack", help="stack to dump", nargs="*")
-    parser.set_defaults(func=cmd_dump)
+    parser.set_defaults(func=cmd_dump, fan_out=True)
 
 
 def cmd_dump(args):
@@ -29,35 +39,150 @@ def cmd_dump(args):
     :param args:
     :return:
     """
-    if args.all:
+    if is_fan_out(args):
+        jobs = fan_out_jobs(args)
+    elif args.all:
         cfn = CloudFormation(args.region, args.profile)
-        stacks = cfn.list_stacks()
+        jobs = [(args.region, args.profile, stack, stack) for stack in sorted(cfn.list_stacks())]
     else:
-        stacks = args.stack
-    for stack in stacks:
-        dump_stack(args.region, args.profile, stack, args.force)
+        jobs = [(args.region, args.profile, stack, stack) for stack in args.stack]
+    stacks = [name for _, _, _, name in jobs]
+
+    start = time()
+    prefetched = prefetch_stacks(args, jobs) if args.use_async else {}
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        futures = {
+            executor.submit(timed_dump_stack, region, profile, stack, args.force, name,
+                            prefetched.get(name)): name
+            for region, profile, stack, name in jobs
+        }
+        for num, future in enumerate(as_completed(futures), 1):
+            stack = futures[future]
+            duration, error = future.result()
+            if error:
+                LOG.error("[%d/%d] Failed to dump stack %s: %s", num, len(stacks), stack, error)
+                failed.append(stack)
+                continue
+            LOG.info("[%d/%d] Dumped stack %s in %.1fs", num, len(stacks), stack, duration)
+
+    total = time() - start
+    LOG.info("Dumped %d stack(s) in %.1fs (%.2f stacks/s)",
+             len(stacks) - len(failed), total, len(stacks) / total if total else 0)
+
+    if failed:
+        LOG.error("Failed to dump %d stack(s): %s", len(failed), ", ".join(sorted(failed)))
+        exit(1)
+
+
+def fan_out_jobs(args):
+    """
+    Return stacks to dump from every region and profile
+    Stacks are dumped to <profile>/<region>/<stack> to keep them apart.
+    :param args: parser arguments
+    :return: list of (region, profile, stack name, local stack name)
+    """
+    jobs = []
+    for profile, region, stacks, error in fan_out(args, list_remote_stacks):
+        if error:
+            LOG.error("Failed to list stacks in %s/%s: %s", profile, region, error)
+            continue
+
+        # labels replace the environment defaults, so pass None on for those
+        target_profile = None if args.profile is None else profile
+        target_region = None if args.region is None else region
+        for stack in stacks:
+            if args.all or stack in args.stack:
+                jobs.append((target_region, target_profile, stack,
+                             path.join(profile, region, stack)))
+
+    return jobs
+
+
+def list_remote_stacks(args):
+    """
+    Return sorted names of the stacks in a single region and profile
+    :param args: parser arguments
+    :return:
+    """
+    return sorted(CloudFormation(args.region, args.profile).list_stacks())
 
 
-def dump_stack(region, profile, stack, force):
+def prefetch_stacks(args, jobs):
+    """
+    Fetch templates and parameters of all stacks at once on the asyncio backend
+    :param args: parser arguments
+    :param jobs: list of (region, profile, stack name, local stack name)
+    :return: dict of local stack name to tuple of template and parameters (or error)
+    """
+    calls = []
+    for region, profile, stack, _ in jobs:
+        calls.append((region, profile, "get_template", (stack,)))
+        calls.append((region, profile, "describe_stack", (stack, False)))
+    results = call_many(args, calls)
+
+    prefetched = {}
+    for num, (_, _, _, name) in enumerate(jobs):
+        template, stack_data = results[2 * num], results[2 * num + 1]
+        errors = [result for result in (stack_data, template) if isinstance(result, Exception)]
+        prefetched[name] = errors[0] if errors else (template, stack_data["Parameters"])
+
+    return prefetched
+
+
+def timed_dump_stack(region, profile, stack, force, name=None,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                     prefetched=None):
+    """
+    Dump one stack and return duration and error (if any) instead of raising
+    :param region: aws region
+    :param profile: aws profile name
+    :param stack: stack name
+    :param force: force overwrite
+    :param name: local stack name (default: stack name)
+    :param prefetched: tuple of template and parameters (or error) fetched before
+    :return: tuple of duration in seconds and error
+    """
+    start = time()
+    try:
+        dump_stack(region, profile, stack, force, name, prefetched)
+    except (ClientError, CloudFormationError, LocalStackError, RemoteStackError, TemplateError,
+            OSError) as err:
+        return time() - start, err
+
+    return time() - start, None
+
+
+def dump_stack(region, profile, stack, force, name=None,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+               prefetched=None):
     """
     Dump one stack to files
     :param region: aws region
     :param profile: aws profile name
     :param stack: stack type
     :param force: force overwrite
+    :param name: local stack name (default: stack name)
+    :param prefetched: tuple of template and parameters (or error) fetched before
     :return:
     """
-    LOG.info("Loading remote stack %s", stack)
-    remote = RemoteStack(stack, region, profile)
-    remote.load()
+    if isinstance(prefetched, Exception):
+        raise prefetched
+
+    if prefetched is None:
+        LOG.info("Loading remote stack %s", stack)
+        remote = RemoteStack(stack, region, profile)
+        remote.load(events=False, change_sets=False, resources=False)
+        prefetched = remote.template, remote.parameters
+    template, parameters = prefetched
 
-    LOG.info("Creating local stack %s", stack)
-    local = LocalStack(stack)
+    name = name or stack
+    LOG.info("Creating local stack %s", name)
+    local = LocalStack(name)
 
     if local.template.exists() and not force:
-        LOG.warning("Stack %s exists locally. Not overwriting without force", stack)
+        LOG.warning("Stack %s exists locally. Not overwriting without force", name)
         return
 
-    LOG.info("Saving local stack %s", stack)
-    local.update(remote.template, remote.parameters)
+    LOG.info("Saving local stack %s", name)
+    local.update(template, parameters)
     local.save()
@@ -2,9 +2,11 @@
 
 import logging
 from sys import stdout
-from time import sleep
 
+from clouds_aws.cli.common import is_ndjson, print_record
 from clouds_aws.remote_stack import RemoteStack, RemoteStackError
+from clouds_aws.remote_stack.polling import PollingPolicy
+from clouds_aws.remote_stack.waiter import StackWaiter
 
 LOG = logging.getLogger(__name__)
 
@@ -18,9 +20,13 @@ def add_parser(subparsers):
     parser = subparsers.add_parser('events', help='output all events of a stack')
     parser.add_argument('-f', '--follow', action='store_true',
                         help='follow events until stack transition complete')
-    parser.add_argument('-l', '--limit', help='limit number of most recent events displayed')
+    parser.add_argument('-t', '--timeout', type=int,
+                        help='stop following after this many seconds (default: never)')
+    parser.add_argument('-l', '--limit', type=int,
+                        help='limit number of most recent events displayed (0: follow new events '
+                             'only)')
     parser.add_argument('stack', help='stack name')
-    parser.set_defaults(func=cmd_events)
+    parser.set_defaults(func=cmd_events, ndjson=True)
 
 
 def cmd_events(args):
@@ -29,52 +35,65 @@ def cmd_events(args):
     :param args:
     :return:
     """
-    stack = RemoteStack(args.stack, args.region, args.profile)
-    stack.load()
+    max_events = args.limit
+    # an empty buffer would never advance, keep all events when displaying none
+    stack = RemoteStack(args.stack, args.region, args.profile, max_events=max_events or None)
 
-    events = stack.events
-    if args.limit:
-        events = events[int(args.limit) * -1:]
-
-    print_events(events)
+    if max_events == 0:
+        # no backlog, only remember the most recent event to follow from
+        try:
+            stack.skip_events()
+        except RemoteStackError as err:
+            LOG.error(err)
+            exit(1)
+        printer = print_event_records if is_ndjson(args) else print_events
+    elif is_ndjson(args):
+        # stream events newest first as they are fetched
+        try:
+            for event in stack.iter_events(max_events):
+                print_record(event)
+        except RemoteStackError as err:
+            LOG.error(err)
+            exit(1)
+        printer = print_event_records
+    else:
+        stack.load(template=False, change_sets=False, resources=False)
+        print_events(stack.events)
+        printer = print_events
 
     # poll until stable state is reached
     if args.follow:
-        poll_events(stack)
+        poll_events(stack, display=printer, timeout=args.timeout)
 
 
-def poll_events(stack, display=True):
+def poll_events(stack, display=True, deleting=False, timeout=None):
     """
+    Wait for the stack to reach a stable state
     :param stack: remote stack object
-    :param display:
-    :return:
+    :param display: print new events while waiting (or function printing a list of events)
+    :param deleting: the stack is being deleted
+    :param timeout: seconds to wait at most (None: wait forever)
+    :return: WaitResult
     """
-    while True:
-        try:
-            new_events = stack.poll_events()
+    printer = display if callable(display) else print_events
 
-            if new_events and display:
-                print_events(new_events)
-            exit_if_transition_finished(stack.events)
-
-        except RemoteStackError as err:
-            LOG.warning(err)
-            exit(0)
+    def display_events(_, events):
+        """ Print new events of a stack (StackWaiter callback) """
+        printer(events)
 
-        sleep(5)
+    waiter = StackWaiter(stack.cfn.region, stack.cfn.profile, PollingPolicy(timeout))
+    waiter.add(stack, on_events=display_events if display else None, deleting=deleting)
+    return waiter.wait()[stack.name]
 
 
-def exit_if_transition_finished(events):
+def print_event_records(events):
     """
-    Exits if the stack reached a stable state
-    :param events:
+    Print events as NDJSON records
+    :param events: list
     :return:
     """
-    if events and events[-1]["ResourceType"] == "AWS::CloudFormation::Stack":
-        if events[-1]["ResourceStatus"][-8:] == 'COMPLETE':
-            exit(0)
-        if events[-1]["ResourceStatus"] == 'DELETE_FAILED':
-            exit(1)
+    for event in events:
+        print_record(event)
 
 
 def print_events(events):
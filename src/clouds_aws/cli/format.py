@@ -2,12 +2,14 @@
 
 import json
 import logging
-from sys import stdin
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from sys import stdin, stdout
 
-from clouds_aws.cli.common import load_local_stack
+from clouds_aws.local_stack import LocalStack, LocalStackError
 from clouds_aws.local_stack import list_stacks as local_stacks
-from clouds_aws.local_stack.helpers import dump_json
-from clouds_aws.local_stack.template import TYPE_JSON
+from clouds_aws.local_stack.helpers import dump_json, write_json
+from clouds_aws.local_stack.template import TemplateError, TYPE_JSON
 
 LOG = logging.getLogger(__name__)
 
@@ -21,6 +23,10 @@ def add_parser(subparsers):
     parser = subparsers.add_parser('format',
                                    help='normalize stack template(s) (for better diffs)')
     parser.add_argument('-a', '--all', action='store_true', help='reformat all stacks')
+    parser.add_argument('-c', '--check', action='store_true',
+                        help='do not write files, exit non-zero if any stack needs reformatting')
+    parser.add_argument('-j', '--jobs', type=int, default=cpu_count() or 1,
+                        help='number of processes to use (default: number of CPUs)')
     parser.add_argument('-p', '--pipe', action='store_true',
                         help='pipe mode - read template from stdin and output to stdout')
     parser.add_argument('stack', help='stack to reformat', nargs='*')
@@ -34,28 +40,60 @@ def cmd_reformat(args):
     :return:
     """
     if args.pipe:
-        print(dump_json(json.loads(stdin.read())))
+        # the input text is released once parsed, the output is written as it is rendered
+        write_json(json.load(stdin), stdout)
+        stdout.write("\n")
         exit()
 
     stacks = args.stack
     if args.all:
-        stacks = local_stacks()
+        stacks = sorted(local_stacks())
 
-    for stack in stacks:
-        LOG.info("Formatting stack %s", stack)
-        reformat_stack(stack)
+    if args.jobs > 1 and len(stacks) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(executor.map(reformat_stack, stacks, [args.check] * len(stacks),
+                                        chunksize=8))
+    else:
+        results = [reformat_stack(stack, args.check) for stack in stacks]
 
+    failed = [stack for stack, (_, error) in zip(stacks, results) if error]
+    changed = [stack for stack, (was_changed, _) in zip(stacks, results) if was_changed]
 
-def reformat_stack(stack_name):
+    for stack, (was_changed, error) in zip(stacks, results):
+        if error:
+            LOG.error("Cannot reformat stack %s: %s", stack, error)
+        elif was_changed and args.check:
+            LOG.warning("Stack %s is not formatted", stack)
+        elif was_changed:
+            LOG.info("Reformatted stack %s", stack)
+
+    LOG.info("%d of %d stack(s) %s", len(changed), len(stacks),
+             "need reformatting" if args.check else "reformatted")
+
+    if failed or (args.check and changed):
+        exit(1)
+
+
+def reformat_stack(stack_name, check=False):
     """
-    Reformat stack in place
+    Reformat stack in place (only files whose content changes are written)
     :param stack_name:
-    :return:
+    :param check: only determine whether the stack would change
+    :return: tuple of changed flag and error (if any)
     """
-    stack = load_local_stack(stack_name)
-    if stack.template.tpl_format != TYPE_JSON:
-        LOG.warning("Cannot reformat stack %s: not of type JSON")
-        return
+    stack = LocalStack(stack_name)
+    try:
+        stack.load()
+        if stack.template.tpl_format != TYPE_JSON:
+            LOG.warning("Cannot reformat stack %s: not of type JSON", stack_name)
+            return False, None
+
+        stack.update(dump_json(stack.template.as_dict()), stack.parameters.parameters)
+    except (LocalStackError, TemplateError, ValueError) as err:
+        # errors are passed between processes as strings
+        return False, str(err)
+
+    if check:
+        return stack.changed(), None
 
-    stack.update(dump_json(stack.template.as_dict()), stack.parameters.parameters)
-    stack.save()
+    return stack.save(), None
@@ -4,8 +4,11 @@ import logging
 
 from tabulate import tabulate
 
+from clouds_aws.cli.common import add_async_arguments, add_cache_arguments, fan_out, \
+    fan_out_calls, is_cached, is_fan_out, is_ndjson, metadata_cache, print_record
 from clouds_aws.local_stack import list_stacks as local_stacks
-from clouds_aws.remote_stack import list_stacks as remote_stacks
+from clouds_aws.local_stack.helpers import dump_json
+from clouds_aws.remote_stack.aws_client import CloudFormation, CloudFormationError
 
 LOG = logging.getLogger(__name__)
 
@@ -20,7 +23,10 @@ def add_parser(subparsers):
     parser.add_argument("-l", "--local", action="store_true",
                         help="list only stacks that exist locally")
     parser.add_argument("-r", "--remote", action="store_true", help="list only stacks in AWS")
-    parser.set_defaults(func=cmd_list)
+    parser.add_argument("-j", "--json", action="store_true", help="output as JSON")
+    add_cache_arguments(parser)
+    add_async_arguments(parser)
+    parser.set_defaults(func=cmd_list, fan_out=True, ndjson=True)
 
 
 def cmd_list(args):
@@ -29,15 +35,98 @@ def cmd_list(args):
     :param args:
     :return:
     """
-    stacks = remote_stacks(args.region, args.profile)
+    if is_fan_out(args):
+        headers = ("Profile", "Region", "Name", "Status")
+        rows = []
+        for profile, region, stacks, error in list_targets(args):
+            if error:
+                LOG.error("%s/%s: %s", profile, region, error)
+                continue
+            rows.extend((profile, region, name, status) for name, status in sorted(stacks.items()))
+    elif is_ndjson(args):
+        # stream stacks in the order they are fetched
+        try:
+            for name, status in iter_stacks(args):
+                print_record({"Name": name, "Status": status})
+        except CloudFormationError as err:
+            LOG.error(err)
+            exit(1)
+        return
+    else:
+        headers = ("Name", "Status")
+        try:
+            rows = sorted(list_stacks(args).items())
+        except CloudFormationError as err:
+            LOG.error(err)
+            exit(1)
 
-    # enrich stacks with local stacks
-    if not args.remote:
-        for stack in [key for key in local_stacks() if key not in stacks.keys()]:
-            stacks[stack] = "LOCAL_ONLY"
+    if is_ndjson(args):
+        for row in rows:
+            print_record(dict(zip(headers, row)))
+        return
+
+    if args.json:
+        print(dump_json([dict(zip(headers, row)) for row in rows]))
+        return
+
+    print(tabulate(rows, headers))
+
+
+def list_targets(args):
+    """
+    Return stacks of every region and profile
+    :param args:
+    :return: list of (profile label, region label, dict of stack name to status, error)
+    """
+    if not args.use_async or is_cached(args):
+        return fan_out(args, list_stacks)
+
+    return [(profile, region, None if error else dict(enrich_stacks(args, stacks.items())), error)
+            for profile, region, stacks, error in fan_out_calls(args, "list_stacks")]
+
+
+def list_stacks(args):
+    """
+    Return stacks of a single region and profile
+    :param args:
+    :return: dict of stack name to status
+    """
+    return dict(iter_stacks(args))
 
-    # only list stacks that exist locally
-    if args.local:
-        stacks = {key: stacks[key] for key in local_stacks() if key in stacks.keys()}
 
-    print(tabulate(sorted(stacks.items()), ("Name", "Status")))
+def iter_stacks(args):
+    """
+    Yield name and status of the stacks of a single region and profile
+    Remote stacks are yielded as their pages are fetched, local only stacks last.
+    :param args:
+    :return:
+    """
+    cfn = CloudFormation(args.region, args.profile)
+    cache = metadata_cache(args, cfn)
+    if cache:
+        remote_stacks = cache.list_stacks().items()
+    else:
+        remote_stacks = ((stack["StackName"], stack["StackStatus"]) for stack in cfn.iter_stacks())
+
+    yield from enrich_stacks(args, remote_stacks)
+
+
+def enrich_stacks(args, remote_stacks):
+    """
+    Yield name and status of remote stacks and local stacks as requested by the arguments
+    :param args:
+    :param remote_stacks: iterable of remote stack name and status
+    :return:
+    """
+    local = set(local_stacks())
+    seen = set()
+    for name, status in remote_stacks:
+        seen.add(name)
+        # only list stacks that exist locally
+        if not args.local or name in local:
+            yield name, status
+
+    # enrich stacks with local stacks
+    if not args.remote:
+        for name in sorted(local - seen):
+            yield name, "LOCAL_ONLY"
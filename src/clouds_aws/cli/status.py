@@ -0,0 +1,164 @@
+""" Command parser definition """
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+
+from botocore.exceptions import ClientError
+from tabulate import tabulate
+
+from clouds_aws.cache import cache_path
+from clouds_aws.cli.common import add_async_arguments, prefetch
+from clouds_aws.local_stack import LocalStack, LocalStackError
+from clouds_aws.local_stack import list_stacks as local_stacks
+from clouds_aws.local_stack.diff import RESOLVED, dynamic_references, normalize, \
+    parameter_changes, parameter_defaults, parse_template, resolved_parameters, template_digest
+from clouds_aws.local_stack.helpers import YAMLLoadError, read_file, write_file
+from clouds_aws.local_stack.template import TemplateError
+from clouds_aws.remote_stack.aws_client import CloudFormation
+from clouds_aws.remote_stack.metadata_cache import MetadataCache
+
+LOG = logging.getLogger(__name__)
+
+IN_SYNC = "in sync"
+NOT_DEPLOYED = "not deployed"
+
+# keys of the cached summary of a local template
+TEMPLATE_INFO = ("digest", "defaults", "resolved", "dynamic")
+
+
+def add_parser(subparsers):
+    """
+    Add command subparser
+    :param subparsers:
+    :return:
+    """
+    parser = subparsers.add_parser('status', help='compare local stacks with AWS in one sweep')
+    parser.add_argument('-j', '--jobs', type=int, default=8,
+                        help='number of templates to fetch concurrently (default: 8)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='fetch all templates, even of stacks not updated since the last run')
+    add_async_arguments(parser)
+    parser.add_argument('stack', help='stacks to compare (default: all local stacks)', nargs='*')
+    parser.set_defaults(func=cmd_status)
+
+
+def cmd_status(args):
+    """
+    Print which local stacks differ from the stacks in AWS
+
+    All stacks are described in a single sweep. Templates are compared by
+    the digest of their normalized content, remote digests are cached per
+    stack version so only templates of stacks updated since the last run
+    are fetched.
+    :param args:
+    :return:
+    """
+    stacks = args.stack or sorted(local_stacks())
+
+    cfn = CloudFormation(args.region, args.profile)
+    remote = {stack_desc["StackName"]: stack_desc for stack_desc in cfn.iter_stacks()}
+
+    # the cache is only used from this thread (sqlite connections are not shared)
+    cache = MetadataCache(cfn)
+    cached = {}
+    if not args.no_cache:
+        cached = {name: cache.template_digest(remote[name]) for name in stacks if name in remote}
+
+    get_template = cfn.get_template
+    if args.use_async:
+        # fetch all missing templates at once, only comparing is left to the threads
+        get_template = prefetch(args, "get_template", [
+            name for name in stacks if name in remote and not cached.get(name)
+        ])
+
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        futures = [
+            executor.submit(compare_stack, get_template, name, remote.get(name), cached.get(name),
+                            not args.no_cache)
+            for name in stacks
+        ]
+
+        rows = []
+        for name, future in zip(stacks, futures):
+            changes, remote_digest = future.result()
+            if remote_digest and remote_digest != cached.get(name):
+                cache.store_template_digest(remote[name], remote_digest)
+
+            status = remote[name]["StackStatus"] if name in remote else ""
+            rows.append((name, status, changes))
+
+    print(tabulate(rows, ("Name", "Status", "Changes")))
+
+
+def compare_stack(get_template, name, stack_desc, remote_digest, use_cache=True):
+    """
+    Compare a local stack with the stack in AWS
+    :param get_template: function returning the template of a stack in AWS
+    :param name: stack name
+    :param stack_desc: raw stack description (None if the stack does not exist)
+    :param remote_digest: digest of the remote template (None: fetch template)
+    :param use_cache: use cached digests of local templates
+    :return: tuple of changes and remote template digest (None if unknown)
+    """
+    local_stack = LocalStack(name, round_trip=False)
+    try:
+        local_stack.load()
+        info = local_template_info(local_stack.template, use_cache)
+    except (LocalStackError, TemplateError, ValueError, YAMLLoadError) as err:
+        return "error: %s" % err, None
+
+    if stack_desc is None:
+        return NOT_DEPLOYED, None
+
+    if remote_digest is None:
+        try:
+            remote_digest = template_digest(normalize(parse_template(get_template(name))))
+        except (ClientError, ValueError, YAMLLoadError) as err:
+            return "error: %s" % err, None
+
+    changes = []
+    if info["digest"] != remote_digest:
+        changes.append("template")
+
+    # the same comparison update and apply use to skip identical stacks
+    remote_parameters = {param["ParameterKey"]: param["ParameterValue"]
+                         for param in stack_desc.get("Parameters", [])}
+    actions = {change.action for change in parameter_changes(
+        info["defaults"], set(info["resolved"]), local_stack.parameters.parameters,
+        remote_parameters)}
+    if actions - {RESOLVED}:
+        changes.append("parameters")
+    if RESOLVED in actions or info["dynamic"]:
+        changes.append("resolved values")
+
+    return ", ".join(changes) or IN_SYNC, remote_digest
+
+
+def local_template_info(template, use_cache=True):
+    """
+    Return digest of the normalized template and what is needed to compare parameters
+    The result is cached per digest of the template file, so unchanged templates are not parsed.
+    :param template: loaded Template
+    :param use_cache: use cached results
+    :return: dict with digest, parameter defaults, names of parameters resolved from SSM
+             and whether the template has dynamic references
+    """
+    cache_file = cache_path("status", template.digest())
+    if use_cache and path.isfile(cache_file):
+        cached = json.loads(read_file(cache_file))
+        if all(key in cached for key in TEMPLATE_INFO):
+            return cached
+
+    tree = normalize(template.as_dict())
+    info = {
+        "digest": template_digest(tree),
+        "defaults": parameter_defaults(tree),
+        "resolved": sorted(resolved_parameters(tree)),
+        "dynamic": any(True for _ in dynamic_references(tree)),
+    }
+
+    write_file(cache_file, json.dumps(info))
+
+    return info
@@ -6,7 +6,8 @@ from botocore.exceptions import ClientError
 
 from clouds_aws.cli.common import load_local_stack
 from clouds_aws.cli.events import poll_events
-from clouds_aws.remote_stack import RemoteStack, list_stacks as remote_stacks
+from clouds_aws.local_stack.diff import stack_diff
+from clouds_aws.remote_stack import RemoteStack, RemoteStackError, stack_exists
 
 LOG = logging.getLogger(__name__)
 
@@ -25,6 +26,10 @@ def add_parser(subparsers):
                              'implies --wait)')
     parser.add_argument('-w', '--wait', action='store_true',
                         help='wait for update to finish (synchronous mode)')
+    parser.add_argument('-t', '--timeout', type=int,
+                        help='give up waiting after this many seconds (default: wait forever)')
+    parser.add_argument('--no-diff', action='store_true',
+                        help='send the update without comparing with the stack in AWS first')
     parser.add_argument('stack', help='stack to update')
     parser.set_defaults(func=cmd_update)
 
@@ -35,12 +40,19 @@ def cmd_update(args):
     :param args:
     :return:
     """
-    local_stack = load_local_stack(args.stack)
+    local_stack = load_local_stack(args.stack, round_trip=False)
     remote_stack = RemoteStack(args.stack, args.region, args.profile)
 
     try:
-        if args.stack in remote_stacks(args.region, args.profile):
-            remote_stack.load()
+        if stack_exists(args.stack, args.region, args.profile):
+            if not args.no_diff:
+                remote_stack.load(events=False, change_sets=False, resources=False)
+                if remote_stack.loaded and \
+                        not stack_diff(local_stack, remote_stack.template, remote_stack.parameters):
+                    LOG.warning("No updates are to be performed")
+                    exit(0)
+
+            remote_stack.skip_events()
             remote_stack.update(
                 local_stack.template,
                 local_stack.parameters
@@ -64,6 +76,13 @@ def cmd_update(args):
         # throw up if not "no updates" case
         raise err
 
+    except RemoteStackError as err:
+        LOG.error(err)
+        exit(1)
+
     # poll until stable state is reached
     if args.events or args.wait:
-        poll_events(remote_stack, args.events)
+        result = poll_events(remote_stack, args.events, timeout=args.timeout)
+        if not result.success:
+            LOG.error("Failed to update stack %s: %s", args.stack, result.status)
+            exit(1)
@@ -1,9 +1,16 @@
 """ Command parser definition """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+from os import path
 
-from clouds_aws.cli.common import load_local_stack
+from clouds_aws.cache import cache_path
+from clouds_aws.cli.common import add_async_arguments, call_many
+from clouds_aws.local_stack import LocalStack, LocalStackError
 from clouds_aws.local_stack import list_stacks as local_stacks
+from clouds_aws.local_stack.helpers import YAMLLoadError
+from clouds_aws.local_stack.template import TemplateError
 from clouds_aws.remote_stack.aws_client import CloudFormation, CloudFormationError
 
 LOG = logging.getLogger(__name__)
@@ -17,6 +24,11 @@ def add_parser(subparsers):
     """
     parser = subparsers.add_parser('validate', help='validate stack template')
     parser.add_argument('-a', '--all', action='store_true', help='validate all stacks')
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+                        help='number of stacks to validate concurrently (default: 4)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='validate templates that have been validated successfully before')
+    add_async_arguments(parser)
     parser.add_argument('stack', help='stack to validate', nargs='*')
     parser.set_defaults(func=cmd_validate)
 
@@ -29,32 +41,119 @@ def cmd_validate(args):
     """
     stacks = args.stack
     if args.all:
-        stacks = local_stacks()
+        stacks = sorted(local_stacks())
 
-    cfn = CloudFormation(args.region, args.profile)
-    success = True
-    for stack in stacks:
-        LOG.info("Validating stack %s", stack)
-        success = success and validate_stack(cfn, stack)
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        # all stacks are checked locally first, each stack is loaded only once
+        checked = dict(zip(stacks, executor.map(load_stack, stacks)))
+        errors = [(stack, error) for stack, (_, error) in checked.items() if error]
 
-    if not success:
+        validate = CloudFormation(args.region, args.profile).validate
+        if args.use_async:
+            # send all templates at once, only marking them valid is left to the threads
+            validate = prefetch_validation(args, [local_stack for local_stack, error
+                                                  in checked.values() if not error])
+
+        futures = {
+            executor.submit(validate_stack, validate, local_stack, not args.no_cache): stack
+            for stack, (local_stack, error) in checked.items() if not error
+        }
+        results = chain(errors, ((futures[future], future.result())
+                                 for future in as_completed(futures)))
+        for num, (stack, error) in enumerate(results, 1):
+            if error:
+                LOG.error("[%d/%d] Failed to validate stack %s:", num, len(stacks), stack)
+                LOG.error(error)
+                failed.append(stack)
+                continue
+            LOG.info("[%d/%d] Validated stack %s", num, len(stacks), stack)
+
+    if failed:
+        LOG.error("Failed to validate %d stack(s): %s", len(failed), ", ".join(sorted(failed)))
         exit(1)
 
 
-def validate_stack(cfn, stack):
+def load_stack(stack):
     """
-    Validate a stack against the AWS API
-    :type cfn: CloudFormation
-    :param cfn: CloudFormation client object
+    Load a stack and check it locally
     :param stack: stack name
-    :return:
+    :return: tuple of LocalStack and error (None if the stack passed the local checks)
     """
-    local_stack = load_local_stack(stack)
+    local_stack = LocalStack(stack, round_trip=False)
     try:
-        cfn.validate(local_stack.template.as_string())
+        local_stack.load()
+        check_syntax(local_stack.template)
+    except (LocalStackError, TemplateError) as err:
+        return local_stack, err
+
+    return local_stack, None
+
+
+def prefetch_validation(args, loaded_stacks):
+    """
+    Validate the templates of all stacks against the AWS API at once on the asyncio backend
+    Templates validated before are left out.
+    :param args: parser arguments
+    :param loaded_stacks: list of LocalStack that passed the local checks
+    :return: function validating a template string (raising its prefetched error)
+    """
+    templates = sorted({
+        local_stack.template.as_string() for local_stack in loaded_stacks
+        if args.no_cache or not path.isfile(cache_path("validate", local_stack.template.digest()))
+    })
+    results = dict(zip(templates, call_many(args, [(args.region, args.profile, "validate", (body,))
+                                                   for body in templates])))
+
+    def validate(tpl_body):
+        """ Raise prefetched validation error of a template """
+        error = results[tpl_body]
+        if isinstance(error, Exception):
+            raise error if isinstance(error, CloudFormationError) else CloudFormationError(error)
+
+    return validate
+
+
+def validate_stack(validate, local_stack, use_cache=True):
+    """
+    Validate a stack that passed the local checks against the AWS API
+    Templates that passed validation before are not sent to the API again.
+    :param validate: function validating a template string against the API
+    :param local_stack: loaded LocalStack
+    :param use_cache: skip templates validated successfully before
+    :return: error (None if the stack is valid)
+    """
+    cache_file = cache_path("validate", local_stack.template.digest())
+    if use_cache and path.isfile(cache_file):
+        LOG.debug("Template of stack %s has been validated before", local_stack.name)
+        return None
+
+    try:
+        validate(local_stack.template.as_string())
     except CloudFormationError as err:
-        LOG.error("Failed to validate stack %s:", stack)
-        LOG.error(err)
-        return False
+        return err
+
+    # an empty file per successfully validated template
+    with open(cache_file, "w", encoding="utf-8"):
+        pass
+
+    return None
+
+
+def check_syntax(template):
+    """
+    Check template syntax without calling the API
+    :param template: Template object
+    :raises TemplateError: if the template is invalid
+    :return:
+    """
+    try:
+        tree = template.as_dict()
+    except (ValueError, YAMLLoadError) as err:
+        raise TemplateError("Template is not well-formed: %s" % err)
+
+    if not isinstance(tree, dict):
+        raise TemplateError("Template is not a mapping")
 
-    return True
+    if "Resources" not in tree:
+        raise TemplateError("Template does not define any Resources")
@@ -1,10 +1,14 @@
 """ LocalStack class """
 
 import logging
-from os import path, curdir, mkdir
+from os import path, curdir, makedirs
 
-from scandir import scandir
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
 
+from clouds_aws.local_stack.helpers import list_files, YAMLLoadError
 from clouds_aws.local_stack.parameters import Parameters
 from clouds_aws.local_stack.template import Template, TemplateError, TYPE_YAML, TYPE_JSON
 
@@ -21,33 +25,40 @@ class LocalStackError(Exception):
 class LocalStack:
     """ File representation of CloudFormation stack """
 
-    def __init__(self, name):
+    def __init__(self, name, round_trip=True):
         """
         Initialize empty Stack object
         :param name: stack name
+        :param round_trip: load parameters for saving them again (slower)
         """
         self.name = name
         self.path = path.join(curdir, STACKS_PREFIX, name)
         LOG.debug("Initializing new stack in %s", self.path)
 
-        self.template = Template(self.path)
-        self.parameters = Parameters(self.path)
+        # the stack directory is listed once, files are read on load() only
+        self.template = Template(self.path, list_files(self.path) or set())
+        self.parameters = Parameters(self.path, round_trip)
 
     def __repr__(self):
         return "LocalStack({})".format(self.name)
 
     def save(self):
         """
-        Save stack to disk
-        :return:
+        Save stack to disk (files with unchanged content are not touched)
+        :return: true if any file has been changed
         """
-        if not path.isdir(path.dirname(self.path)):
-            mkdir(path.dirname(self.path))
-        if not path.isdir(self.path):
-            mkdir(self.path)
+        makedirs(self.path, exist_ok=True)
 
-        self.template.save()
-        self.parameters.save()
+        template_changed = self.template.save()
+        parameters_changed = self.parameters.save()
+        return template_changed or parameters_changed
+
+    def changed(self):
+        """
+        Return true if saving the stack would change any file
+        :return:
+        """
+        return self.template.changed() or self.parameters.changed()
 
     def load(self):
         """
@@ -62,7 +73,10 @@ class LocalStack:
         except TemplateError as err:
             raise LocalStackError("Failed to load stack template: %s" % str(err))
 
-        self.parameters.load()
+        try:
+            self.parameters.load()
+        except YAMLLoadError as err:
+            raise LocalStackError("Failed to load stack parameters: %s" % str(err))
 
     def update(self, new_template, new_parameters):
         """
@@ -80,6 +94,8 @@ class LocalStack:
 def list_stacks():
     """
     Return list of local stacks
+    Directories without a template are skipped, e.g. the <profile>/<region>
+    folders stacks of several regions or profiles are dumped to.
     :return:
     """
     stacks = []
@@ -88,7 +104,11 @@ def list_stacks():
         return stacks
 
     for item in scandir(path.join(curdir, STACKS_PREFIX)):
-        if item.is_dir():
-            stacks.append(item.name)
+        if not item.is_dir():
+            continue
+        if not Template(item.path).exists():
+            LOG.debug("Skipping %s without template", item.path)
+            continue
+        stacks.append(item.name)
 
     return stacks
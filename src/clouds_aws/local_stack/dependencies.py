@@ -0,0 +1,225 @@
+""" Dependencies between local stacks """
+
+import logging
+import re
+
+LOG = logging.getLogger(__name__)
+
+SUB_VARIABLE = re.compile(r"\$\{([^!}][^}]*)\}")
+
+
+class DependencyError(Exception):
+    """ Custom errors for stack dependencies """
+    pass
+
+
+def dependency_graph(stacks):
+    """
+    Return stacks each stack depends on
+    A stack depends on another stack if it imports one of its exports or if
+    one of its parameter values is the name of the other stack.
+    :param stacks: dict of stack name to loaded LocalStack
+    :return: dict of stack name to set of stack names
+    """
+    exporters = {}
+    for name, stack in stacks.items():
+        for export in stack_exports(stack):
+            exporters[export] = name
+
+    graph = {}
+    for name, stack in stacks.items():
+        graph[name] = set()
+        for export in stack_imports(stack):
+            if export not in exporters:
+                LOG.debug("Stack %s imports %s which is not exported by a local stack",
+                          name, export)
+            elif exporters[export] != name:
+                graph[name].add(exporters[export])
+
+        for value in stack.parameters.parameters.values():
+            if isinstance(value, str) and value in stacks and value != name:
+                graph[name].add(value)
+
+    return graph
+
+
+def dependency_order(graph):
+    """
+    Return stack names ordered so that every stack follows its dependencies
+    :param graph: dict of stack name to set of stack names (see dependency_graph)
+    :raises DependencyError: if stacks depend on each other
+    :return: list of stack names
+    """
+    order = []
+    done = set()
+    remaining = {name: set(deps) & set(graph) for name, deps in graph.items()}
+
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if deps <= done)
+        if not ready:
+            raise DependencyError("Circular dependency between stacks: %s" %
+                                  ", ".join(sorted(remaining)))
+        for name in ready:
+            del remaining[name]
+        order.extend(ready)
+        done.update(ready)
+
+    return order
+
+
+def stack_exports(stack):
+    """
+    Return names of the values exported by a stack (as far as they can be determined locally)
+    :param stack: loaded LocalStack
+    :return: set of export names
+    """
+    context = _context(stack)
+    exports = set()
+    for output in (stack.template.as_dict().get("Outputs") or {}).values():
+        if not isinstance(output, dict) or not isinstance(output.get("Export"), dict):
+            continue
+        export = resolve(output["Export"].get("Name"), context)
+        if export is None:
+            LOG.warning("Cannot determine export name of stack %s", stack.name)
+            continue
+        exports.add(export)
+
+    return exports
+
+
+def stack_imports(stack):
+    """
+    Return names of the values imported by a stack (as far as they can be determined locally)
+    :param stack: loaded LocalStack
+    :return: set of export names
+    """
+    context = _context(stack)
+    imports = set()
+    for value in _find_intrinsic(stack.template.as_dict(), "Fn::ImportValue"):
+        export = resolve(value, context)
+        if export is None:
+            LOG.warning("Cannot determine imported value of stack %s", stack.name)
+            continue
+        imports.add(export)
+
+    return imports
+
+
+def resolve(node, context):
+    """
+    Return string value of a template node or None if it cannot be resolved locally
+    Supports plain strings, Ref, Fn::Sub and Fn::Join with references to
+    parameters and AWS::StackName.
+    :param node: template node
+    :param context: dict of resolvable references
+    :return:
+    """
+    if isinstance(node, str):
+        return node
+
+    function, value = _intrinsic(node)
+    if function == "Ref":
+        return context.get(value) if isinstance(value, str) else None
+
+    if function == "Fn::Sub":
+        return _resolve_sub(value, context)
+
+    if function == "Fn::Join":
+        return _resolve_join(value, context)
+
+    return None
+
+
+def _resolve_sub(value, context):
+    """
+    Return value of Fn::Sub or None if it cannot be resolved locally
+    :param value: string or list of string and dict of variables
+    :param context: dict of resolvable references
+    :return:
+    """
+    variables = dict(context)
+    if isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[1], dict):
+        for key, var_node in value[1].items():
+            variables[key] = resolve(var_node, context)
+        value = value[0]
+    if not isinstance(value, str):
+        return None
+    names = SUB_VARIABLE.findall(value)
+    if any(variables.get(name) is None for name in names):
+        return None
+    return SUB_VARIABLE.sub(lambda match: variables[match.group(1)], value)
+
+
+def _resolve_join(value, context):
+    """
+    Return value of Fn::Join or None if it cannot be resolved locally
+    :param value: list of delimiter and list of parts
+    :param context: dict of resolvable references
+    :return:
+    """
+    if not isinstance(value, (list, tuple)) or len(value) != 2 or \
+            not isinstance(value[1], (list, tuple)):
+        return None
+    parts = [resolve(part, context) for part in value[1]]
+    if not isinstance(value[0], str) or None in parts:
+        return None
+    return value[0].join(parts)
+
+
+def _context(stack):
+    """
+    Return references resolvable without AWS: stack name and parameter values
+    :param stack: loaded LocalStack
+    :return:
+    """
+    context = {}
+    for name, definition in (stack.template.as_dict().get("Parameters") or {}).items():
+        if isinstance(definition, dict) and isinstance(definition.get("Default"), str):
+            context[name] = definition["Default"]
+
+    for name, value in stack.parameters.parameters.items():
+        if isinstance(value, str):
+            context[name] = value
+
+    context["AWS::StackName"] = stack.name
+    return context
+
+
+def _intrinsic(node):
+    """
+    Return name and argument of an intrinsic function node (long or YAML short form)
+    :param node: template node
+    :return: tuple of function name and argument (None, None if not a function)
+    """
+    if isinstance(node, dict) and len(node) == 1:
+        key, value = next(iter(node.items()))
+        if key == "Ref" or key.startswith("Fn::"):
+            return key, value
+
+    # YAML short form, e.g. !ImportValue (tagged nodes of the round trip loader)
+    tag = getattr(getattr(node, "tag", None), "value", None)
+    if tag and tag.startswith("!"):
+        function = tag[1:] if tag == "!Ref" else "Fn::" + tag[1:]
+        return function, getattr(node, "value", node)
+
+    return None, None
+
+
+def _find_intrinsic(node, function):
+    """
+    Yield arguments of all calls of an intrinsic function in a template
+    :param node: template node
+    :param function: function name
+    :return:
+    """
+    name, value = _intrinsic(node)
+    if name == function:
+        yield value
+        return
+
+    if isinstance(node, dict):
+        for child in node.values():
+            yield from _find_intrinsic(child, function)
+    elif isinstance(node, (list, tuple)):
+        for child in node:
+            yield from _find_intrinsic(child, function)
@@ -0,0 +1,264 @@
+""" Structural diff between local stacks and stacks in AWS """
+
+import json
+import logging
+import re
+from collections import namedtuple
+from datetime import date, datetime
+from hashlib import sha256
+
+try:
+    from json import JSONDecodeError
+except ImportError:
+    JSONDecodeError = ValueError
+
+from clouds_aws.local_stack.helpers import load_yaml
+
+LOG = logging.getLogger(__name__)
+
+ADDED = "+"
+REMOVED = "-"
+CHANGED = "~"
+RESOLVED = "*"
+
+# value AWS returns for parameters declared with NoEcho
+NO_ECHO = "****"
+
+# parameter types and dynamic references resolved by AWS on every update
+SSM_PARAMETER_TYPE = "AWS::SSM::Parameter::Value<"
+DYNAMIC_REFERENCE = re.compile(r"{{resolve:")
+
+# difference found at path (tuple of keys) from old to new value
+# action: ADDED, REMOVED, CHANGED or RESOLVED (may change, resolved by AWS on update)
+# old/new: None if added/removed
+Change = namedtuple("Change", ["action", "path", "old", "new"])
+
+
+def stack_diff(local_stack, remote_template, remote_parameters):
+    """
+    Return differences between a local stack and a stack in AWS
+    Key order and formatting do not matter, YAML short form intrinsic
+    functions equal their long form. Parameter values are compared including
+    template defaults, values hidden by NoEcho always differ. Values AWS
+    resolves on update (SSM parameter types, dynamic references) always
+    differ, too.
+    :param local_stack: loaded LocalStack
+    :param remote_template: template string of the stack in AWS
+    :param remote_parameters: dict of parameter name to value of the stack in AWS
+    :return: list of Change (empty if the stacks are identical)
+    """
+    local_template = normalize(local_stack.template.as_dict())
+    changes = list(diff_trees(normalize(parse_template(remote_template)), local_template,
+                              ("Template",)))
+    changes.extend(dynamic_references(local_template, ("Template",)))
+
+    changes.extend(parameter_changes(parameter_defaults(local_template),
+                                     resolved_parameters(local_template),
+                                     local_stack.parameters.parameters, remote_parameters))
+
+    return changes
+
+
+def parameter_changes(defaults, resolved, parameters, remote_parameters):
+    """
+    Return differences between the parameters of a local stack and a stack in AWS
+    Values hidden by NoEcho and values resolved from SSM always differ.
+    :param defaults: parameter defaults of the local template (see parameter_defaults)
+    :param resolved: names of parameters resolved from SSM (see resolved_parameters)
+    :param parameters: dict of parameter name to value of the local stack
+    :param remote_parameters: dict of parameter name to value of the stack in AWS
+    :return: list of Change
+    """
+    local_parameters = parameter_values(defaults, parameters)
+
+    changes = []
+    for name in sorted(set(local_parameters) | set(remote_parameters)):
+        if name in resolved:
+            LOG.debug("Parameter %s is resolved from SSM, assuming it changed", name)
+            changes.append(Change(RESOLVED, ("Parameters", name), remote_parameters.get(name),
+                                  local_parameters.get(name)))
+        elif remote_parameters.get(name) == NO_ECHO:
+            LOG.debug("Parameter %s is hidden by NoEcho, assuming it changed", name)
+            changes.append(Change(CHANGED, ("Parameters", name), NO_ECHO,
+                                  local_parameters.get(name)))
+        else:
+            changes.extend(diff_trees(remote_parameters.get(name), local_parameters.get(name),
+                                      ("Parameters", name)))
+
+    return changes
+
+
+def parameter_values(defaults, parameters):
+    """
+    Return effective parameter values of a stack as AWS reports them
+    :param defaults: parameter defaults of the template (see parameter_defaults)
+    :param parameters: dict of parameter name to value
+    :return: dict of parameter name to string value
+    """
+    values = dict(defaults)
+    values.update((name, _parameter_string(value)) for name, value in parameters.items())
+    return values
+
+
+def parameter_defaults(template):
+    """
+    Return default values of the parameters declared by a template
+    :param template: normalized template
+    :return: dict of parameter name to string value
+    """
+    defaults = {}
+    for name, definition in (template.get("Parameters") or {}).items():
+        if isinstance(definition, dict) and "Default" in definition:
+            defaults[name] = _parameter_string(definition["Default"])
+
+    return defaults
+
+
+def resolved_parameters(template):
+    """
+    Return names of the parameters whose values are resolved from SSM on every update
+    :param template: normalized template
+    :return: set of parameter names
+    """
+    return {name for name, definition in (template.get("Parameters") or {}).items()
+            if isinstance(definition, dict) and
+            str(definition.get("Type", "")).startswith(SSM_PARAMETER_TYPE)}
+
+
+def dynamic_references(node, path=()):
+    """
+    Yield a RESOLVED change for every value with a dynamic reference ({{resolve:...}})
+    :param node: normalized template node
+    :param path: path of the node
+    :return:
+    """
+    if isinstance(node, dict):
+        for key in sorted(node):
+            yield from dynamic_references(node[key], path + (key,))
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            yield from dynamic_references(value, path + (index,))
+    elif isinstance(node, str) and DYNAMIC_REFERENCE.search(node):
+        yield Change(RESOLVED, path, node, node)
+
+
+def template_digest(template):
+    """
+    Return SHA256 hex digest of a normalized template
+    Templates differing in key order or formatting only have the same digest.
+    :param template: normalized template
+    :return:
+    """
+    return sha256(_compact(template).encode("utf-8")).hexdigest()
+
+
+def parse_template(template):
+    """
+    Return template string parsed as JSON or YAML
+    :param template: template string
+    :return:
+    """
+    try:
+        return json.loads(template)
+    except JSONDecodeError:
+        # short form intrinsic functions require the round trip loader
+        return load_yaml(template)
+
+
+def normalize(node):
+    """
+    Return template tree as plain dicts, lists and scalars
+    YAML short form intrinsic functions are expanded to their long form.
+    :param node: template node
+    :return:
+    """
+    tag = getattr(getattr(node, "tag", None), "value", None)
+    if tag and tag.startswith("!"):
+        value = normalize(getattr(node, "value", _untagged(node)))
+        if tag == "!GetAtt" and isinstance(value, str):
+            value = value.split(".", 1)
+        if tag in ("!Ref", "!Condition"):
+            return {tag[1:]: value}
+        return {"Fn::" + tag[1:]: value}
+
+    return _untagged(node)
+
+
+def _untagged(node):
+    """
+    Return node normalized without regard to its tag
+    :param node: template node
+    :return:
+    """
+    if isinstance(node, dict):
+        return {str(key): normalize(value) for key, value in node.items()}
+    if isinstance(node, (list, tuple)):
+        return [normalize(value) for value in node]
+    if isinstance(node, str):
+        return str(node)
+    # unquoted dates (e.g. AWSTemplateFormatVersion) equal their string in JSON templates
+    if isinstance(node, date) and not isinstance(node, datetime):
+        return node.isoformat()
+    return node
+
+
+def diff_trees(old, new, path=()):
+    """
+    Yield differences between two normalized trees
+    :param old: old tree
+    :param new: new tree
+    :param path: path of the trees
+    :return:
+    """
+    if old == new:
+        return
+
+    if old is None:
+        yield Change(ADDED, path, None, new)
+    elif new is None:
+        yield Change(REMOVED, path, old, None)
+    elif isinstance(old, dict) and isinstance(new, dict):
+        for key in sorted(set(old) | set(new)):
+            yield from diff_trees(old.get(key), new.get(key), path + (key,))
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            yield from diff_trees(old_item, new_item, path + (index,))
+    else:
+        yield Change(CHANGED, path, old, new)
+
+
+def format_change(change):
+    """
+    Return a change as a single line
+    :type change: Change
+    :param change: change
+    :return:
+    """
+    path = ".".join(str(key) for key in change.path)
+    if change.action == ADDED:
+        return "%s %s: %s" % (ADDED, path, _compact(change.new))
+    if change.action == REMOVED:
+        return "%s %s: %s" % (REMOVED, path, _compact(change.old))
+    if change.action == RESOLVED:
+        return "%s %s: %s (resolved by AWS on update)" % (RESOLVED, path, _compact(change.new))
+    return "%s %s: %s -> %s" % (CHANGED, path, _compact(change.old), _compact(change.new))
+
+
+def _compact(value):
+    """
+    Return value as compact JSON
+    :param value:
+    :return:
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _parameter_string(value):
+    """
+    Return parameter value as sent to AWS (lists are comma separated)
+    :param value:
+    :return:
+    """
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(item) for item in value)
+    return str(value)
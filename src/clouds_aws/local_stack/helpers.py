@@ -1,11 +1,43 @@
 """ Common helper functions """
 
-import json
+import logging
+from io import StringIO
+from os import chmod, curdir, fdopen, path, replace, stat, umask, unlink
 
-import re
-from ruamel.yaml import YAML
-from ruamel.yaml.compat import StringIO
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
 
+from tempfile import mkstemp
+from threading import Lock, local
+
+from clouds_aws.local_stack import json_encoder
+
+LOG = logging.getLogger(__name__)
+
+# encoding of stack files
+ENCODING = "utf-8"
+
+# characters collected before writing streamed JSON
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# YAML engines per thread
+_ENGINES = local()
+
+# file contents read in this process: file name -> (mtime, size, content)
+_FILES = {}
+_FILES_LOCK = Lock()
+
+# permissions of new files (mkstemp creates files readable by the owner only)
+_UMASK = umask(0)
+umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+class YAMLLoadError(Exception):
+    """ Error parsing YAML """
+    pass
 
 
 def dump_json(template):
@@ -13,32 +45,28 @@ def dump_json(template):
     Returns template as normalized JSON string
     :param template: json string
     """
-    jstr = json.dumps(template, indent=2, sort_keys=True)
+    return json_encoder.encode(template)
 
-    # Common function
-    jstr = re.sub(r'{\s*("Fn::GetAtt")\s*:\s*\[\s*("\S+")\s*,\s*("\S+")\s*\]\s*}',
-                  r'{ \1: [ \2, \3 ] }', jstr)
-    jstr = re.sub(r'{\s*("Fn::Select")\s*:\s*\[\s*("\d+")\s*,\s*({[^}]+})\s*]\s*}',
-                  r'{ \1: [ \2, \3 ] }', jstr)
-    jstr = re.sub(r'{\s*("Fn::GetAZs")\s*:\s*("\S*")\s*}', r'{ \1: \2 }', jstr)
 
-    # References
-    jstr = re.sub(r'{\s*("Ref")\s*:\s*("\S+")\s*}', r'{ \1: \2 }', jstr)
-
-    # Key/Value pairs
-    jstr = re.sub(r'{\s*("Name"):\s*("\S+"),\s*("Value"):\s*("\S*")\s*}',
-                  r'{ \1: \2, \3: \4 }', jstr)
-    jstr = re.sub(r'{\s*("Key"):\s*("\S+"),\s*("Value"):\s*("[\S ]*")\s*}',
-                  r'{ \1: \2, \3: \4 }', jstr)
-    jstr = re.sub(r'{\s*("Key"):\s*("\S+"),\s*("Value"):\s*({[^}]*})\s*}',
-                  r'{ \1: \2, \3: \4 }', jstr)
-    jstr = re.sub(r'{\s*("Field"):\s*("\S+"),\s*("Values"):\s*\[\s*(\S+)\s*\]\s*}',
-                  r'{ \1: \2, \3: [ \4 ] }', jstr)
+def write_json(template, stream):
+    """
+    Write template as normalized JSON to a stream piece by piece
+    Pieces are collected up to WRITE_BUFFER_SIZE characters before being written.
+    :param template: template dict
+    :param stream: text stream
+    :return:
+    """
+    pieces = []
+    size = 0
+    for piece in json_encoder.iterencode(template):
+        pieces.append(piece)
+        size += len(piece)
+        if size >= WRITE_BUFFER_SIZE:
+            stream.write("".join(pieces))
+            pieces = []
+            size = 0
 
-    jstr = re.sub(r'\[\n\r?\s*([^\n]*)\n\r?\s*\](,?)', r'[ \1 ]\2', jstr)
-    jstr = re.sub(r'\s+$', r'', jstr, flags=re.MULTILINE)
-    jstr = re.sub(r'([^\n]*)\n\s*("\\n",?)', r'\1\2', jstr, flags=re.MULTILINE)
-    return jstr
+    stream.write("".join(pieces))
 
 
 def dump_yaml(template):
@@ -47,20 +75,121 @@ def dump_yaml(template):
     :param template:
     :return:
     """
-    yaml = YAML()
-    yaml.preserve_quotes = True
-
     stream = StringIO()
-    yaml.dump(template, stream)
+    _yaml().dump(template, stream)
     return stream.getvalue()
 
 
-def load_yaml(data):
+def load_yaml(data, round_trip=True):
     """
     Safely load YAML into dictionary
     :param data:
+    :param round_trip: preserve quotes and comments for dumping the data again
+        (otherwise the faster safe loader is used, libyaml based if available)
+    :return:
+    """
+    from ruamel.yaml.error import YAMLError  # pylint: disable=import-outside-toplevel
+
+    try:
+        return _yaml("rt" if round_trip else "safe").load(data)
+    except YAMLError as err:
+        raise YAMLLoadError(err)
+
+
+def _yaml(typ="rt"):
+    """
+    Return YAML engine of the current thread
+    Engines are expensive to set up and must not be shared between threads.
+    ruamel.yaml is imported on first use only as it is slow to import.
+    :param typ: "rt" (round trip) or "safe"
+    :return:
+    """
+    if not hasattr(_ENGINES, "engines"):
+        _ENGINES.engines = {}
+
+    if typ not in _ENGINES.engines:
+        from ruamel.yaml import YAML  # pylint: disable=import-outside-toplevel
+
+        yaml = YAML(typ=typ)
+        if typ == "rt":
+            yaml.preserve_quotes = True
+        _ENGINES.engines[typ] = yaml
+
+    return _ENGINES.engines[typ]
+
+
+def list_files(directory):
+    """
+    Return names of the regular files in a directory (None if there is no such directory)
+    :param directory: directory path
+    :return:
+    """
+    try:
+        return {entry.name for entry in scandir(directory) if entry.is_file()}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def read_file(filename):
+    """
+    Return file content, served from memory as long as the file is unchanged on disk
+    :param filename: file name (with path)
+    :raises FileNotFoundError: if the file does not exist
     :return:
     """
-    yaml = YAML()
-    yaml.preserve_quotes = True
-    return yaml.load(data)
+    status = stat(filename)
+    with _FILES_LOCK:
+        cached = _FILES.get(filename)
+    if cached and cached[:2] == (status.st_mtime_ns, status.st_size):
+        return cached[2]
+
+    with open(filename, encoding=ENCODING) as file_fp:
+        content = file_fp.read()
+
+    with _FILES_LOCK:
+        _FILES[filename] = (status.st_mtime_ns, status.st_size, content)
+    return content
+
+
+def file_changed(filename, content):
+    """
+    Return true if the file does not exist or its bytes differ from content
+    :param filename: file name (with path)
+    :param content: file content
+    :return:
+    """
+    try:
+        with open(filename, "rb") as file_fp:
+            return file_fp.read() != content.encode(ENCODING)
+    except FileNotFoundError:
+        return True
+
+
+def write_file(filename, content):
+    """
+    Atomically replace file if its content changed and remember the content for subsequent reads
+    :param filename: file name (with path)
+    :param content: file content
+    :return: true if the file has been written
+    """
+    if not file_changed(filename, content):
+        LOG.debug("File %s is unchanged", filename)
+        return False
+
+    LOG.debug("Writing file %s", filename)
+    # unique per call, threads may write the same file (e.g. identical cache entries)
+    tmp_fd, tmp_filename = mkstemp(prefix=".%s." % path.basename(filename), suffix=".tmp",
+                                   dir=path.dirname(filename) or curdir)
+    try:
+        with fdopen(tmp_fd, "wb") as file_fp:
+            file_fp.write(content.encode(ENCODING))
+        chmod(tmp_filename, stat(filename).st_mode if path.exists(filename) else NEW_FILE_MODE)
+        replace(tmp_filename, filename)
+    finally:
+        if path.exists(tmp_filename):
+            unlink(tmp_filename)
+
+    status = stat(filename)
+    with _FILES_LOCK:
+        _FILES[filename] = (status.st_mtime_ns, status.st_size, content)
+    return True
@@ -0,0 +1,471 @@
+""" Single pass encoder for normalized JSON templates
+
+Renders the same text as json.dumps(indent=2, sort_keys=True) followed by the
+regular expression rewrites below, but decides about the compact forms while
+walking the template tree once. The regular expressions are only applied to
+nodes they would rewrite into irregular text.
+"""
+
+import json
+import re
+
+from json.encoder import encode_basestring_ascii
+
+INDENT = 2
+
+DIGITS = re.compile(r"[0-9]+$")
+SELECT_CLOSE = re.compile(r"\s*\]\s*}")
+KEY_VALUE_CLOSE = re.compile(r"\s*}")
+
+# closing brackets matched inside a string by the regular expressions
+GETATT_CLOSE = re.compile(r'"\S+"\s*\]\s*}')
+WORD_CLOSE = re.compile(r'"\S*"\s*}')
+STRING_CLOSE = re.compile(r'"[\S ]*"\s*}')
+TOKEN_LIST_CLOSE = re.compile(r'\S+\s*\]\s*}')
+LIST_CLOSE_SECOND_LINE = re.compile(r'[^\n]*\n\s*\]')
+
+# first keys (in sorted order) of dictionaries that may be rendered in compact form
+COMPACT_KEYS = ("Fn::GetAtt", "Fn::GetAZs", "Fn::Select", "Field", "Key", "Name", "Ref")
+
+# dictionary levels written piece by piece by iterencode (template and its sections)
+STREAM_DEPTH = 2
+
+
+class IrregularTemplateError(Exception):
+    """
+    Raised for structures the regular expressions rewrite into irregular
+    text (i.e. where they match a nested closing bracket). Such a node is
+    rendered by the regular expressions.
+    """
+    pass
+
+
+def encode(template):
+    """
+    Return template as normalized JSON string
+    :param template: template dict
+    :return:
+    """
+    try:
+        return _render(template, 0)[0]
+    except IrregularTemplateError:
+        return _rewrite_lines(_rewrite_structures(json.dumps(template, indent=INDENT,
+                                                             sort_keys=True)))
+
+
+def iterencode(template, depth=STREAM_DEPTH):
+    """
+    Yield normalized JSON text of a template in pieces
+    The top levels of the template are written one entry at a time, so at most
+    one entry of a section (e.g. one resource) is held in memory as text. The
+    joined pieces are equal to encode(template).
+    :param template: template dict
+    :param depth: number of dictionary levels written piece by piece
+    :return:
+    """
+    if not _streamable(template):
+        yield encode(template)
+        return
+
+    yield from _iter_render(template, 0, depth)
+
+
+def _iter_render(node, level, depth):
+    """
+    Yield text of a node in pieces
+    :param node: template node
+    :param level: indentation of the closing bracket of the node
+    :param depth: number of dictionary levels written piece by piece
+    :return:
+    """
+    if depth < 1 or not _streamable(node):
+        yield _render(node, level)[0]
+        return
+
+    indent = "\n" + " " * (level + INDENT)
+    yield "{"
+    for num, (key, value) in enumerate(sorted(node.items())):
+        yield "%s%s%s: " % ("," if num else "", indent, _encode_key(key))
+        yield from _iter_render(value, level + INDENT, depth - 1)
+
+    yield "\n%s}" % (" " * level)
+
+
+def _streamable(node):
+    """
+    Return true if a dictionary is rendered entry by entry
+    That is the case if neither the dictionary nor any of its values can be
+    irregular in a way that makes the regular expressions rewrite the
+    dictionary as a whole.
+    :param node: template node
+    :return:
+    """
+    if not isinstance(node, dict) or not node or min(node) in COMPACT_KEYS or "\n" in node:
+        return False
+
+    for value in node.values():
+        if isinstance(value, (list, tuple)):
+            return False
+        if isinstance(value, dict) and value and min(value) in COMPACT_KEYS:
+            return False
+
+    return True
+
+
+def _render(node, level):  # pylint: disable=too-many-return-statements
+    """
+    Return text of a node and whether it consists of a single line before
+    single element lists are inlined
+    :param node: template node
+    :param level: indentation of the closing bracket of the node
+    :return: tuple of text and single line flag
+    """
+    if isinstance(node, str):
+        return encode_basestring_ascii(node), True
+
+    if isinstance(node, dict):
+        if not node:
+            return "{}", True
+
+        try:
+            compact = _compact_dict(node, level)
+            if compact:
+                return compact
+
+            return _render_dict(node, level), False
+        except IrregularTemplateError:
+            return _render_regex(node, level)
+
+    if isinstance(node, (list, tuple)):
+        if not node:
+            return "[]", True
+
+        items = [_render(item, level + INDENT) for item in node]
+        if len(items) == 1 and items[0][1]:
+            return "[ %s ]" % items[0][0], False
+
+        return _render_list([text for text, _ in items], level), False
+
+    return _encode_scalar(node), True
+
+
+def _render_regex(node, level):
+    """
+    Return text of a node rewritten by regular expressions
+    The rewrites of irregular nodes do not reach beyond the node's text unless
+    its second line starts with a closing bracket. Such a node is left to the
+    enclosing dictionary.
+    :param node: dict
+    :param level: indentation
+    :return: tuple of text and single line flag
+    """
+    text = _rewrite_structures(json.dumps(node, indent=INDENT, sort_keys=True))
+    if LIST_CLOSE_SECOND_LINE.match(text):
+        # would be inlined together with an enclosing list
+        raise IrregularTemplateError("Irregular node closes list on second line")
+
+    single_line = "\n" not in text
+    text = _rewrite_lines(text)
+    return text.replace("\n", "\n" + " " * level), single_line
+
+
+def _rewrite_structures(jstr):
+    """
+    Rewrite common structures in JSON text to compact form
+    :param jstr: JSON text
+    :return:
+    """
+    # Common function
+    jstr = re.sub(r'{\s*("Fn::GetAtt")\s*:\s*\[\s*("\S+")\s*,\s*("\S+")\s*\]\s*}',
+                  r'{ \1: [ \2, \3 ] }', jstr)
+    jstr = re.sub(r'{\s*("Fn::Select")\s*:\s*\[\s*("\d+")\s*,\s*({[^}]+})\s*]\s*}',
+                  r'{ \1: [ \2, \3 ] }', jstr)
+    jstr = re.sub(r'{\s*("Fn::GetAZs")\s*:\s*("\S*")\s*}', r'{ \1: \2 }', jstr)
+
+    # References
+    jstr = re.sub(r'{\s*("Ref")\s*:\s*("\S+")\s*}', r'{ \1: \2 }', jstr)
+
+    # Key/Value pairs
+    jstr = re.sub(r'{\s*("Name"):\s*("\S+"),\s*("Value"):\s*("\S*")\s*}',
+                  r'{ \1: \2, \3: \4 }', jstr)
+    jstr = re.sub(r'{\s*("Key"):\s*("\S+"),\s*("Value"):\s*("[\S ]*")\s*}',
+                  r'{ \1: \2, \3: \4 }', jstr)
+    jstr = re.sub(r'{\s*("Key"):\s*("\S+"),\s*("Value"):\s*({[^}]*})\s*}',
+                  r'{ \1: \2, \3: \4 }', jstr)
+    jstr = re.sub(r'{\s*("Field"):\s*("\S+"),\s*("Values"):\s*\[\s*(\S+)\s*\]\s*}',
+                  r'{ \1: \2, \3: [ \4 ] }', jstr)
+    return jstr
+
+
+def _rewrite_lines(jstr):
+    """
+    Inline single element lists and join line break strings with the previous line
+    :param jstr: JSON text
+    :return:
+    """
+    jstr = re.sub(r'\[\n\r?\s*([^\n]*)\n\r?\s*\](,?)', r'[ \1 ]\2', jstr)
+    jstr = re.sub(r'\s+$', r'', jstr, flags=re.MULTILINE)
+    jstr = re.sub(r'([^\n]*)\n\s*("\\n",?)', r'\1\2', jstr, flags=re.MULTILINE)
+    return jstr
+
+
+def _render_dict(node, level):
+    """
+    Return multi line text of a dictionary
+    :param node: dict
+    :param level: indentation
+    :return:
+    """
+    indent = "\n" + " " * (level + INDENT)
+    lines = []
+    for key, value in sorted(node.items()):
+        key = _encode_key(key)
+        if key == '"\\n"':
+            raise IrregularTemplateError("Line break as dictionary key")
+        lines.append("%s%s: %s" % (indent, key, _render(value, level + INDENT)[0]))
+
+    return "{%s\n%s}" % (",".join(lines), " " * level)
+
+
+def _render_list(items, level):
+    """
+    Return multi line text of a list
+    Line break strings are appended to the previous line.
+    :param items: rendered list items
+    :param level: indentation
+    :return:
+    """
+    indent = "\n" + " " * (level + INDENT)
+    parts = ["["]
+    for num, text in enumerate(items):
+        if num:
+            parts.append(",")
+        if text != '"\\n"':
+            parts.append(indent)
+        parts.append(text)
+
+    parts.append("\n%s]" % (" " * level))
+    return "".join(parts)
+
+
+def _compact_dict(node, level):  # pylint: disable=too-many-return-statements,too-many-branches
+    """
+    Return compact form of common CloudFormation structures or None
+    The structure is identified by the first key in sorted order.
+    :param node: non-empty dict
+    :param level: indentation
+    :return: tuple of text and single line flag
+    """
+    keys = sorted(node)
+    first = node[keys[0]]
+    second = node[keys[1]] if len(keys) > 1 else None
+
+    if keys[0] == "Fn::Select":
+        return _compact_select(node, level)
+
+    if keys[0] == "Fn::GetAtt":
+        if isinstance(first, (list, tuple)) and len(first) > 1 and _is_word(first[0]) and \
+                isinstance(first[1], str):
+            if len(keys) == 1 and len(first) == 2 and _is_word(first[1]):
+                return '{ "Fn::GetAtt": [ %s, %s ] }' % tuple(
+                    encode_basestring_ascii(item) for item in first), True
+            _check_string(GETATT_CLOSE, first[1])
+        return None
+
+    if keys[0] in ("Fn::GetAZs", "Ref"):
+        if isinstance(first, str):
+            if len(keys) == 1 and _is_word(first, allow_empty=keys[0] == "Fn::GetAZs"):
+                return '{ %s: %s }' % (encode_basestring_ascii(keys[0]),
+                                       encode_basestring_ascii(first)), True
+            _check_string(WORD_CLOSE, first)
+        return None
+
+    if len(keys) < 2:
+        return None
+
+    if keys[:2] == ["Name", "Value"] and _is_word(first) and isinstance(second, str):
+        if len(keys) == 2 and _is_word(second, allow_empty=True):
+            return '{ "Name": %s, "Value": %s }' % (encode_basestring_ascii(first),
+                                                   encode_basestring_ascii(second)), True
+        _check_string(WORD_CLOSE, second)
+
+    elif keys[:2] == ["Key", "Value"] and _is_word(first):
+        if isinstance(second, dict):
+            return _compact_key_value_dict(node, level)
+
+        if isinstance(second, str):
+            if len(keys) == 2:
+                return '{ "Key": %s, "Value": %s }' % (encode_basestring_ascii(first),
+                                                      encode_basestring_ascii(second)), True
+            _check_string(STRING_CLOSE, second)
+
+    elif keys[:2] == ["Field", "Values"] and _is_word(first) and \
+            isinstance(second, (list, tuple)) and second:
+        if len(keys) == 2 and len(second) == 1 and _is_token(second[0]):
+            return '{ "Field": %s, "Values": [ %s ] }' % (encode_basestring_ascii(first),
+                                                         _render(second[0], 0)[0]), True
+        if isinstance(second[0], str):
+            _check_string(TOKEN_LIST_CLOSE, second[0])
+
+    return None
+
+
+def _check_string(pattern, value):
+    """
+    Raise IrregularTemplateError if pattern matches inside the JSON string
+    :param pattern: compiled regular expression
+    :param value: string
+    :return:
+    """
+    if pattern.match(encode_basestring_ascii(value)):
+        raise IrregularTemplateError("Closing brackets inside string")
+
+
+def _compact_select(node, level):
+    """
+    Return compact form of Fn::Select with a dictionary as second argument
+    :param node: dict
+    :param level: indentation
+    :return: tuple of text and single line flag
+    """
+    args = node["Fn::Select"]
+    if not isinstance(args, (list, tuple)) or len(args) < 2:
+        return None
+
+    if not isinstance(args[0], str) or not DIGITS.match(args[0]) or \
+            not isinstance(args[1], dict) or not args[1]:
+        return None
+
+    rest = _inner_close(args[1])
+    if rest is not None:
+        if SELECT_CLOSE.match(rest):
+            raise IrregularTemplateError("Fn::Select with nested dictionary")
+        return None
+
+    if len(args) != 2 or len(node) != 1:
+        return None
+
+    text, single_line = _render(args[1], level + 2 * INDENT)
+    return '{ "Fn::Select": [ %s, %s ] }' % (encode_basestring_ascii(args[0]), text), single_line
+
+
+def _compact_key_value_dict(node, level):
+    """
+    Return compact form of Key/Value pair with a dictionary as value
+    :param node: dict
+    :param level: indentation
+    :return: tuple of text and single line flag
+    """
+    rest = _inner_close(node["Value"])
+    if rest is not None:
+        if KEY_VALUE_CLOSE.match(rest):
+            raise IrregularTemplateError("Key/Value pair with nested dictionary")
+        return None
+
+    if len(node) != 2:
+        return None
+
+    text, single_line = _render(node["Value"], level + INDENT)
+    return '{ "Key": %s, "Value": %s }' % (encode_basestring_ascii(node["Key"]), text), single_line
+
+
+def _inner_close(node):
+    """
+    Return the text following the first closing brace inside a dictionary's
+    content or None if its own closing brace comes first
+    :param node: dict
+    :return:
+    """
+    items = sorted(node.items())
+    for num, (key, value) in enumerate(items):
+        key = _encode_key(key)
+        pos = key.find("}")
+        if pos != -1:
+            return key[pos + 1:]
+
+        rest = _first_close(value, "," if num < len(items) - 1 else "}")
+        if rest is not None:
+            return rest
+
+    return None
+
+
+def _first_close(node, follow):
+    """
+    Return the text following the first closing brace in a node's text
+    :param node: template node
+    :param follow: closing brackets following the node
+    :return:
+    """
+    if isinstance(node, str):
+        text = encode_basestring_ascii(node)
+        pos = text.find("}")
+        return text[pos + 1:] if pos != -1 else None
+
+    if isinstance(node, dict):
+        rest = _inner_close(node)
+        return follow if rest is None else rest
+
+    if isinstance(node, (list, tuple)):
+        for num, item in enumerate(node):
+            rest = _first_close(item, "," if num < len(node) - 1 else "]" + follow)
+            if rest is not None:
+                return rest
+
+    return None
+
+
+def _is_word(value, allow_empty=False):
+    """
+    Return true if value is a string without spaces
+    :param value:
+    :param allow_empty: accept empty string
+    :return:
+    """
+    return isinstance(value, str) and (allow_empty or value != "") and \
+        " " not in encode_basestring_ascii(value)
+
+
+def _is_token(value):
+    """
+    Return true if value is rendered without any whitespace
+    :param value:
+    :return:
+    """
+    if isinstance(value, str):
+        return _is_word(value, allow_empty=True)
+    if isinstance(value, (dict, list, tuple)):
+        return not value
+    return True
+
+
+def _encode_key(key):
+    """
+    Return dictionary key as JSON string (same conversions as json.dumps)
+    :param key:
+    :return:
+    """
+    if isinstance(key, str):
+        return encode_basestring_ascii(key)
+    if isinstance(key, float) or key is True or key is False or key is None:
+        return encode_basestring_ascii(_encode_scalar(key))
+    if isinstance(key, int):
+        return encode_basestring_ascii(int.__repr__(key))
+    raise TypeError("keys must be str, int, float, bool or None, not %s" % type(key).__name__)
+
+
+def _encode_scalar(value):
+    """
+    Return JSON representation of a scalar value
+    :param value:
+    :return:
+    """
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    return json.dumps(value)
@@ -2,7 +2,8 @@
 import logging
 from os import path, unlink
 
-from clouds_aws.local_stack.helpers import dump_yaml, load_yaml
+from clouds_aws.local_stack.helpers import dump_yaml, file_changed, load_yaml, read_file, \
+    write_file
 
 LOG = logging.getLogger(__name__)
 
@@ -15,16 +16,17 @@ class ParameterError(Exception):
 class Parameters:
     """ Parameters class """
 
-    def __init__(self, stack_path):
+    def __init__(self, stack_path, round_trip=True):
         """
         Initialize empty parameters object
+        The parameters file is not read before calling load().
         :param stack_path: stack directory path
+        :param round_trip: preserve quotes and comments (required to save parameters)
         """
         LOG.debug("Initializing new parameters in path %s", stack_path)
         self.path = stack_path
         self.parameters = {}
-
-        self.load()
+        self.round_trip = round_trip
 
     def __repr__(self):
         return "Parameters({})".format(self.path)
@@ -37,31 +39,42 @@ class Parameters:
         Load parameters from file
         :return:
         """
-        if not path.isfile(self._filename()):
+        try:
+            content = read_file(self._filename())
+        except FileNotFoundError:
             LOG.debug("Not loading empty parameters")
+            self.parameters = {}
             return
 
         LOG.debug("Loading parameters from file %s", self._filename())
-        with open(self._filename()) as param_fp:
-            self.parameters = load_yaml(param_fp)
+        self.parameters = load_yaml(content, round_trip=self.round_trip)
 
     def save(self):
         """
-        Save parameters to file
-        :return:
+        Save parameters to file (unless unchanged)
+        :return: true if the file has been changed
         """
         LOG.debug("Saving parameters to file %s", self._filename())
         if not self.parameters:
             if path.isfile(self._filename()):
                 LOG.info("Deleting parameters file %s", self._filename())
                 unlink(self._filename())
-                return
+                return True
 
             LOG.info("Skipping empty parameters")
-            return
+            return False
+
+        return write_file(self._filename(), dump_yaml(self.parameters))
+
+    def changed(self):
+        """
+        Return true if saving the parameters would change the file
+        :return:
+        """
+        if not self.parameters:
+            return path.isfile(self._filename())
 
-        with open(self._filename(), "w") as param_fp:
-            param_fp.write(dump_yaml(self.parameters))
+        return file_changed(self._filename(), dump_yaml(self.parameters))
 
     def as_list(self):
         """
@@ -8,9 +8,11 @@ except ImportError:
     JSONDecodeError = ValueError
 
 import logging
+from hashlib import sha256
 from os import path, unlink
 
-from clouds_aws.local_stack.helpers import load_yaml
+from clouds_aws.local_stack.helpers import file_changed, list_files, load_yaml, read_file, \
+    write_file, YAMLLoadError
 
 LOG = logging.getLogger(__name__)
 
@@ -27,26 +29,29 @@ class TemplateError(Exception):
 class Template:
     """ CloudFormation template"""
 
-    def __init__(self, stack_path):
+    def __init__(self, stack_path, files=None):
         """
         Initialize empty CloudFormation template of specific type
+        The template file is not read before calling load().
         :param stack_path: stack directory path
+        :param files: names of the files in the stack directory (listed if not given)
         """
         LOG.debug("Initializing new template in path %s", stack_path)
         self.path = stack_path
 
-        loaded = False
+        # parsed template: (digest, format, tree)
+        self._parsed = None
+        self._set_template("")
+
+        if files is None:
+            files = list_files(stack_path) or set()
+
         for tpl_type in (TYPE_YAML, TYPE_JSON):
             self.tpl_format = tpl_type
-            LOG.debug("Testing file %s", self._filename())
-            if path.isfile(self._filename()):
-                self.load()
-                loaded = True
+            if self._filename(with_path=False) in files:
                 break
-
-        if not loaded:
+        else:
             self.tpl_format = TYPE_DEFAULT
-            self._template = ""
 
     def __repr__(self):
         return "Template({})".format(self.path)
@@ -59,18 +64,30 @@ class Template:
         Load template from file
         :return:
         """
-        with open(self._filename()) as tpl_file:
-            self._template = tpl_file.read()
+        try:
+            self._set_template(read_file(self._filename()))
+        except FileNotFoundError:
+            raise TemplateError("No template file in %s" % self.path)
 
     def save(self):
         """
-        Save template to file
+        Save template to file (unless unchanged)
+        :return: true if any file has been changed
+        """
+        removed = self.unlink(keep=self._filename())
+        return write_file(self._filename(), self._template) or removed
+
+    def changed(self):
+        """
+        Return true if saving the template would change any file
         :return:
         """
-        self.unlink()
-        LOG.debug("Writing file %s", self._filename())
-        with open(self._filename(), "w") as tpl_file:
-            tpl_file.write(self._template)
+        for ext in ["json", "yaml"]:
+            filename = self._filename(extension=ext)
+            if filename != self._filename() and path.exists(filename):
+                return True
+
+        return file_changed(self._filename(), self._template)
 
     def from_string(self, template):
         """
@@ -79,22 +96,21 @@ class Template:
         :param template: template string
         :return:
         """
-        self._template = template
+        self._set_template(template)
 
         try:
-            json.loads(template)
+            self._parse(TYPE_JSON)
             self.tpl_format = TYPE_JSON
             return
         except JSONDecodeError:
             pass
 
         try:
-            load_yaml(template)
+            self._parse(TYPE_YAML)
             self.tpl_format = TYPE_YAML
             return
-        except yaml.YAMLError as err:
+        except YAMLLoadError as err:
             LOG.warning(err)
-            pass
 
         raise TemplateError("Unable to determine template format")
 
@@ -108,15 +124,48 @@ class Template:
     def as_dict(self):
         """
         Return template as dictionary
+        The parsed template is cached and shared, do not modify it.
         :return:
         """
-        if self.tpl_format == TYPE_JSON:
-            return json.loads(self._template)
+        if self.tpl_format not in (TYPE_JSON, TYPE_YAML):
+            raise TemplateError("Invalid template format value")
 
-        if self.tpl_format == TYPE_YAML:
-            return load_yaml(self._template)
+        return self._parse(self.tpl_format)
 
-        raise TemplateError("Invalid template format value")
+    def digest(self):
+        """
+        Return SHA256 hex digest of the template string
+        :return:
+        """
+        if self._digest is None:
+            self._digest = sha256(self._template.encode("utf-8")).hexdigest()
+        return self._digest
+
+    def _set_template(self, template):
+        """
+        Set template string (invalidates digest)
+        :param template: template string
+        :return:
+        """
+        self._template = template
+        self._digest = None
+
+    def _parse(self, tpl_format):
+        """
+        Return parsed template (cached by content digest and format)
+        :param tpl_format: TYPE_JSON or TYPE_YAML
+        :return:
+        """
+        if self._parsed and self._parsed[:2] == (self.digest(), tpl_format):
+            return self._parsed[2]
+
+        if tpl_format == TYPE_JSON:
+            tree = json.loads(self._template)
+        else:
+            tree = load_yaml(self._template)
+
+        self._parsed = (self.digest(), tpl_format, tree)
+        return tree
 
     def exists(self):
         """
@@ -125,16 +174,22 @@ class Template:
         """
         return path.exists(self._filename())
 
-    def unlink(self):
+    def unlink(self, keep=None):
         """
         Cleanup template files
-        :return:
+        :param keep: file name (with path) not to remove
+        :return: true if any file has been removed
         """
+        removed = False
         for ext in ["json", "yaml"]:
+            if self._filename(extension=ext) == keep:
+                continue
             try:
                 unlink(self._filename(extension=ext))
+                removed = True
             except FileNotFoundError:
                 pass
+        return removed
 
     def _filename(self, with_path=True, extension=None):
         """
@@ -1,6 +1,7 @@
 """ RemoteStack class """
 
 import logging
+from collections import deque
 
 from clouds_aws.local_stack import Template, Parameters
 from clouds_aws.remote_stack.aws_client import CloudFormation, CloudFormationError
@@ -8,6 +9,9 @@ from clouds_aws.remote_stack.change_set import ChangeSet
 
 LOG = logging.getLogger(__name__)
 
+# number of most recent events kept in memory
+EVENT_BUFFER_SIZE = 1000
+
 
 class RemoteStackError(Exception):
     """ Custom errors for RemoteStack class """
@@ -17,9 +21,10 @@ class RemoteStackError(Exception):
 class RemoteStack:
     """ Remote CloudFormation stack in AWS """
 
-    def __init__(self, name, region, profile):
+    def __init__(self, name, region, profile, max_events=EVENT_BUFFER_SIZE):
         """
         Initialize remote stack
+        :param max_events: size of event buffer (None: keep all events)
         """
         self.name = name
         self.cfn = CloudFormation(region, profile)
@@ -30,7 +35,7 @@ class RemoteStack:
         self.outputs = {}
         self.resources = {}
 
-        self.events = []
+        self.events = deque(maxlen=max_events)
         self.loaded = False
 
         self.change_sets = {}
@@ -38,13 +43,20 @@ class RemoteStack:
     def __repr__(self):
         return "RemoteStack({}, {}, {})".format(self.name, self.cfn.region, self.cfn.profile)
 
-    def load(self):
+    def load(self, template=True, events=True, change_sets=True, resources=True):
         """
         Load template/parameters from CloudFormation
+
+        Parameters and outputs are always loaded, everything else can be
+        skipped to save API calls.
+        :param template: load template
+        :param events: load events
+        :param change_sets: load change sets
+        :param resources: load resources
         :return:
         """
         try:
-            stack_data = self.cfn.describe_stack(self.name)
+            stack_data = self.cfn.describe_stack(self.name, resources=resources)
         except CloudFormationError as err:
             LOG.error(err)
             return
@@ -53,10 +65,14 @@ class RemoteStack:
         self.outputs = stack_data["Outputs"]
         self.resources = stack_data["Resources"]
 
-        self.template = self.cfn.get_template(self.name)
-        self._update_events()
+        if template:
+            self.template = self.cfn.get_template(self.name)
+
+        if events:
+            self._update_events()
 
-        self.change_sets = self.list_change_sets()
+        if change_sets:
+            self.change_sets = self.list_change_sets()
 
         self.loaded = True
 
@@ -67,7 +83,10 @@ class RemoteStack:
         :param parameters: parameters object
         :return:
         """
-        self.cfn.create_stack(self.name, template, parameters)
+        try:
+            self.cfn.create_stack(self.name, template, parameters)
+        except CloudFormationError as err:
+            raise RemoteStackError(err)
 
     def update(self, template, parameters):
         """
@@ -78,7 +97,10 @@ class RemoteStack:
         :param parameters: parameters object
         :return:
         """
-        self.cfn.update_stack(self.name, template, parameters)
+        try:
+            self.cfn.update_stack(self.name, template, parameters)
+        except CloudFormationError as err:
+            raise RemoteStackError(err)
 
     def delete(self):
         """
@@ -97,6 +119,15 @@ class RemoteStack:
         change.load()
         return change
 
+    def has_change_set(self, name):
+        """
+        Return true if a change set exists (stops fetching change sets once found)
+        :param name: change set name
+        :return:
+        """
+        return any(change_set["ChangeSetName"] == name
+                   for change_set in self.cfn.list_change_sets(self.name))
+
     def list_change_sets(self):
         """
         Return dict of change sets
@@ -114,25 +145,50 @@ class RemoteStack:
 
     def _update_events(self):
         """
-        Update stack events from AWS API
-        :return:
+        Fetch events newer than the most recent known event from AWS API
+        :return: list of new events
         """
+        last_event_id = self.events[-1]["EventId"] if self.events else None
         try:
-            for event in self.cfn.describe_stack_events(self.name):
-                if self.events and event["Timestamp"] <= self.events[-1]["Timestamp"]:
-                    continue
-                self.events.append(event)
+            new_events = self.cfn.describe_stack_events(
+                self.name, last_event_id=last_event_id, limit=self.events.maxlen)
         except CloudFormationError as err:
             raise RemoteStackError(err)
 
+        self.events.extend(new_events)
+        return new_events
+
     def poll_events(self):
         """
         Return new events
         :return:
         """
-        num_events = len(self.events)
-        self._update_events()
-        return self.events[num_events:]
+        return self._update_events()
+
+    def iter_events(self, limit=None):
+        """
+        Yield events newest first as they are fetched
+        The newest event is kept, so polling returns events newer than it.
+        :param limit: maximum number of (most recent) events
+        :return:
+        """
+        try:
+            for num, event in enumerate(self.cfn.iter_stack_events(self.name, limit=limit)):
+                if num == 0:
+                    self.events.append(event)
+                yield event
+        except CloudFormationError as err:
+            raise RemoteStackError(err)
+
+    def skip_events(self):
+        """
+        Load the most recent event only, so polling returns events newer than now
+        :return:
+        """
+        try:
+            self.events.extend(self.cfn.describe_stack_events(self.name, limit=1))
+        except CloudFormationError as err:
+            raise RemoteStackError(err)
 
 
 def list_stacks(region, profile):
@@ -142,3 +198,14 @@ def list_stacks(region, profile):
     :return:
     """
     return CloudFormation(region, profile).list_stacks()
+
+
+def stack_exists(name, region, profile):
+    """
+    Return true if a single remote stack exists
+    :param name: stack name
+    :param region:
+    :param profile:
+    :return:
+    """
+    return CloudFormation(region, profile).stack_exists(name)
@@ -0,0 +1,280 @@
+""" AWS API client class on asyncio (aiobotocore) """
+
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+
+from botocore.exceptions import ClientError
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import AioSession
+except ImportError:
+    AioConfig = AioSession = None
+
+from clouds_aws.local_stack.helpers import dump_json
+from clouds_aws.remote_stack.aws_client import CloudFormationError, \
+    merge_change_set_pages, template_arguments
+
+LOG = logging.getLogger(__name__)
+
+# maximum number of requests in flight (all regions and profiles together)
+DEFAULT_CONCURRENCY = 64
+
+CLIENT_CONFIG = {
+    "retries": {"mode": "standard", "max_attempts": 10},
+}
+
+
+class AsyncUnavailable(Exception):
+    """ aiobotocore is not installed """
+    pass
+
+
+def call_many(calls, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Run many API calls concurrently on a single thread
+    :param calls: list of (region, profile, AsyncCloudFormation method name, tuple of arguments)
+    :param concurrency: maximum number of requests in flight
+    :raises AsyncUnavailable: if aiobotocore is not installed
+    :return: list of results (or raised exceptions) in order of the calls
+    """
+    if AioSession is None:
+        raise AsyncUnavailable("The async backend requires aiobotocore "
+                               "(pip install 'clouds-aws[async]')")
+
+    return asyncio.run(_call_many(calls, concurrency))
+
+
+async def _call_many(calls, concurrency):
+    """
+    Run API calls sharing one client per region and profile
+    :param calls: list of (region, profile, method name, tuple of arguments)
+    :param concurrency: maximum number of requests in flight
+    :return: list of results (or raised exceptions)
+    """
+    semaphore = asyncio.BoundedSemaphore(max(concurrency, 1))
+    sessions = {}
+    clients = {}
+
+    async with AsyncExitStack() as stack:
+        for region, profile, _, _ in calls:
+            if profile not in sessions:
+                sessions[profile] = AioSession(profile=profile)
+            if (region, profile) not in clients:
+                clients[region, profile] = await stack.enter_async_context(
+                    AsyncCloudFormation(region, profile, semaphore, sessions[profile]))
+
+        return await asyncio.gather(
+            *(getattr(clients[region, profile], method)(*args)
+              for region, profile, method, args in calls),
+            return_exceptions=True)
+
+
+class AsyncCloudFormation:
+    """
+    AWS API wrapper on asyncio with the read methods of CloudFormation
+
+    Use as async context manager. All requests, including every single page
+    of paginated calls, are bounded by a semaphore that may be shared by
+    several clients.
+    """
+
+    def __init__(self, region, profile, semaphore=None, session=None):
+        """
+        Initialize asyncio CloudFormation client
+        :param region: AWS region
+        :param profile: AWS config profile name
+        :param semaphore: asyncio semaphore bounding requests in flight
+        :param session: AioSession (default: new session for the profile)
+        """
+        self.region = region
+        self.profile = profile
+        self.semaphore = semaphore or asyncio.BoundedSemaphore(DEFAULT_CONCURRENCY)
+        self.session = session
+
+        self.client = None
+        self._client_context = None
+
+    def __repr__(self):
+        return "AsyncCloudFormation({}, {})".format(self.region, self.profile)
+
+    async def __aenter__(self):
+        if AioSession is None:
+            raise AsyncUnavailable("The async backend requires aiobotocore")
+
+        session = self.session or AioSession(profile=self.profile)
+        self._client_context = session.create_client(
+            "cloudformation", region_name=self.region, config=AioConfig(**CLIENT_CONFIG))
+        self.client = await self._client_context.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._client_context.__aexit__(exc_type, exc_value, traceback)
+        self.client = None
+
+    async def _call(self, operation, **kwargs):
+        """
+        Call an API operation once a request slot is free
+        :param operation: client method name
+        :return: response
+        """
+        async with self.semaphore:
+            return await getattr(self.client, operation)(**kwargs)
+
+    async def _pages(self, operation, **kwargs):
+        """
+        Yield pages of a paginated API operation, each fetched once a request slot is free
+        :param operation: client method name
+        :return:
+        """
+        # aiter()/anext() builtins require Python 3.10
+        pages = self.client.get_paginator(operation).paginate(**kwargs).__aiter__()  # pylint: disable=unnecessary-dunder-call
+        while True:
+            async with self.semaphore:
+                try:
+                    page = await pages.__anext__()  # pylint: disable=unnecessary-dunder-call
+                except StopAsyncIteration:
+                    return
+            yield page
+
+    async def list_stacks(self):
+        """
+        Return all remote stacks
+        :return: dict of stack name to status
+        """
+        remote_stacks = {}
+        async for page in self._pages("describe_stacks"):
+            for stack in page["Stacks"]:
+                remote_stacks[stack["StackName"]] = stack["StackStatus"]
+
+        return remote_stacks
+
+    async def stack_description(self, stack):
+        """
+        Return raw stack description or None if the stack does not exist
+        :param stack: stack name
+        :return:
+        """
+        try:
+            return (await self._call("describe_stacks", StackName=stack))["Stacks"][0]
+        except ClientError as err:
+            if "does not exist" in str(err):
+                return None
+            raise err
+
+    async def stack_status(self, stack):
+        """
+        Return status of a single stack or None if it does not exist
+        :param stack: stack name
+        :return:
+        """
+        stack_desc = await self.stack_description(stack)
+        if stack_desc is None:
+            return None
+        return stack_desc["StackStatus"]
+
+    async def describe_stack(self, stack, resources=True):
+        """
+        Return stack details (see CloudFormation.describe_stack)
+        :param stack: stack name
+        :param resources: include stack resources
+        :return:
+        """
+        stack_desc = await self.stack_description(stack)
+        if stack_desc is None:
+            raise CloudFormationError("No such stack: %s" % stack)
+
+        stack_data = {
+            "Parameters": {param["ParameterKey"]: param["ParameterValue"]
+                           for param in stack_desc.get("Parameters", [])},
+            "Outputs": {output["OutputKey"]: output["OutputValue"]
+                        for output in stack_desc.get("Outputs", [])},
+            "Resources": {},
+        }
+
+        if resources:
+            async for page in self._pages("list_stack_resources", StackName=stack):
+                for resource in page["StackResourceSummaries"]:
+                    stack_data["Resources"][resource["LogicalResourceId"]] = {
+                        "ResourceType": resource["ResourceType"],
+                        "PhysicalResourceId": resource.get("PhysicalResourceId")
+                    }
+
+        return stack_data
+
+    async def get_template(self, stack):
+        """
+        Return stack template
+        :param stack: stack name
+        :return:
+        """
+        tpl_body = (await self._call("get_template", StackName=stack))["TemplateBody"]
+
+        # JSON is returned as OrderedDict by the client
+        if isinstance(tpl_body, OrderedDict):
+            return dump_json(tpl_body)
+
+        return tpl_body
+
+    async def describe_stack_events(self, stack, last_event_id=None, limit=None):
+        """
+        Return stack events in chronological order (see CloudFormation.describe_stack_events)
+        :param stack: stack name
+        :param last_event_id: id of the most recent event already known
+        :param limit: maximum number of (most recent) events to return
+        :return:
+        """
+        events = []
+        try:
+            async for page in self._pages("describe_stack_events", StackName=stack):
+                for raw_event in page["StackEvents"]:
+                    if raw_event["EventId"] == last_event_id or \
+                            (limit is not None and len(events) >= limit):
+                        return events[::-1]
+                    events.append(raw_event)
+        except ClientError as err:
+            if "does not exist" in str(err):
+                raise CloudFormationError("No such stack: %s" % stack)
+            raise err
+
+        return events[::-1]
+
+    async def list_change_sets(self, stack):
+        """
+        Return change set summaries
+        :param stack: stack name
+        :return:
+        """
+        summaries = []
+        async for page in self._pages("list_change_sets", StackName=stack):
+            summaries.extend(page["Summaries"])
+
+        return summaries
+
+    async def describe_change_set(self, stack, name):
+        """
+        Return a change set description (changes of all pages)
+        :param stack: stack name
+        :param name: change set name
+        :return:
+        """
+        pages = [page async for page in self._pages("describe_change_set", StackName=stack,
+                                                    ChangeSetName=name)]
+        return merge_change_set_pages(pages)
+
+    async def validate(self, tpl_body):
+        """
+        Validate template using the API
+        Large templates are uploaded to S3 first (in a worker thread).
+        :param tpl_body: template as string
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        source = await loop.run_in_executor(None, template_arguments, tpl_body, self.region,
+                                            self.profile)
+        try:
+            await self._call("validate_template", **source)
+        except ClientError as err:
+            raise CloudFormationError(err)
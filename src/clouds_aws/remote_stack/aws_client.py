@@ -2,22 +2,71 @@
 
 import logging
 from collections import OrderedDict
+from threading import Lock
+from time import time
 
-import boto3
 from botocore.exceptions import ClientError
 
 from clouds_aws.local_stack.helpers import dump_json
+from clouds_aws.remote_stack.sessions import get_client, get_resource
+from clouds_aws.remote_stack.template_upload import TemplateSizeError, template_source
+from clouds_aws.remote_stack.wire_format import minify, minify_enabled
 
 LOG = logging.getLogger(__name__)
 CAPABILITIES = ['CAPABILITY_IAM', 'CAPABILITY_NAMED_IAM', 'CAPABILITY_AUTO_EXPAND']
 
+# stack index cache shared by all CloudFormation objects of this process
+STACK_CACHE_TTL = 30
+_STACK_CACHE = {}
+_STACK_CACHE_LOCK = Lock()
+
+# one lock per cache key, held while sweeping (sweeps of other regions/profiles run concurrently)
+_SWEEP_LOCKS = {}
+
+
+def template_arguments(template, region, profile):
+    """
+    Return API arguments passing a template inline or (if too large) by S3 URL
+    Templates are minified first if enabled (files on disk are not touched).
+    :param template: template string
+    :param region: aws region
+    :param profile: aws profile name
+    :raises CloudFormationError: if the template is too large
+    :return: dict with either TemplateBody or TemplateURL
+    """
+    if minify_enabled():
+        minified = minify(template)
+        LOG.debug("Minified template from %d to %d characters", len(template), len(minified))
+        template = minified
+
+    try:
+        return template_source(template, region, profile)
+    except TemplateSizeError as err:
+        raise CloudFormationError(err)
+
+
+def merge_change_set_pages(pages):
+    """
+    Return a change set description with the changes of all its pages
+    :param pages: pages of describe_change_set
+    :return:
+    """
+    change_set = None
+    for page in pages:
+        if change_set is None:
+            change_set = page
+        else:
+            change_set.setdefault("Changes", []).extend(page.get("Changes", []))
+
+    return change_set
+
 
 class CloudFormationError(Exception):
     """ Custom error class for CloudFormation"""
     pass
 
 
-class CloudFormation:
+class CloudFormation:  # pylint: disable=too-many-public-methods
     """ AWS API wrapper """
 
     def __init__(self, region, profile):
@@ -40,11 +89,7 @@ class CloudFormation:
         :param service:
         :return:
         """
-        if self.profile:
-            session = boto3.Session(profile_name=self.profile)
-            return session.client(service, self.region)
-
-        return boto3.client(service, self.region)
+        return get_client(service, self.region, self.profile)
 
     def _get_resource(self, service):
         """
@@ -52,87 +97,197 @@ class CloudFormation:
         :param service:
         :return:
         """
-        if self.profile:
-            session = boto3.Session(profile_name=self.profile)
-            return session.resource(service, self.region)
+        return get_resource(service, self.region, self.profile)
 
-        return boto3.resource(service, self.region)
+    def _template_source(self, template):
+        """
+        Return API arguments passing a template inline or (if too large) by S3 URL
+        :param template: template string
+        :return:
+        """
+        return template_arguments(template, self.region, self.profile)
 
-    def list_stacks(self):
+    def _cache_key(self):
         """
-        Return all remote stacks
+        Return key of this client's entry in the stack index cache
         :return:
         """
-        paginator = self.client.get_paginator('describe_stacks')
-        remote_stacks = {}
+        return self.region, self.profile
 
-        for page in paginator.paginate():
-            for stack in page["Stacks"]:
+    def list_stacks(self, refresh=False):
+        """
+        Return all remote stacks (served from the stack index cache if not expired)
+        :param refresh: ignore cached stack index
+        :return:
+        """
+        key = self._cache_key()
+        with _STACK_CACHE_LOCK:
+            sweep_lock = _SWEEP_LOCKS.setdefault(key, Lock())
+
+        # concurrent callers for the same key wait for one sweep instead of repeating it
+        with sweep_lock:
+            with _STACK_CACHE_LOCK:
+                cached = _STACK_CACHE.get(key)
+            if cached and not refresh and time() - cached[0] < STACK_CACHE_TTL:
+                return dict(cached[1])
+
+            remote_stacks = {}
+            for stack in self.iter_stacks():
                 remote_stacks[stack["StackName"]] = stack["StackStatus"]
 
-        return remote_stacks
+            with _STACK_CACHE_LOCK:
+                _STACK_CACHE[key] = (time(), remote_stacks)
+            return dict(remote_stacks)
 
-    def describe_stack_events(self, stack):
+    def iter_stacks(self):
         """
-        Return all stack events
-        :param stack: stack name
+        Yield raw stack descriptions, fetching pages as they are consumed (bypasses the cache)
         :return:
         """
-        if stack not in self.list_stacks():
-            raise CloudFormationError("No such stack: %s" % stack)
+        paginator = self.client.get_paginator('describe_stacks')
+        for page in paginator.paginate():
+            yield from page["Stacks"]
 
-        paginator = self.client.get_paginator('describe_stack_events')
-        events = []
+    def invalidate_stacks(self):
+        """
+        Drop cached stack index for this region/profile
+        :return:
+        """
+        with _STACK_CACHE_LOCK:
+            _STACK_CACHE.pop(self._cache_key(), None)
 
-        for page in paginator.paginate(StackName=stack):
-            for raw_event in page["StackEvents"]:
-                events.append(raw_event)
+    def stack_description(self, stack):
+        """
+        Return raw stack description or None if the stack does not exist
+        :param stack: stack name
+        :return:
+        """
+        try:
+            return self.client.describe_stacks(StackName=stack)['Stacks'][0]
+        except ClientError as err:
+            if "does not exist" in str(err):
+                return None
+            raise err
 
-        return reversed(events)
+    def stack_status(self, stack):
+        """
+        Return status of a single stack or None if it does not exist
+        :param stack: stack name
+        :return:
+        """
+        stack_desc = self.stack_description(stack)
+        if stack_desc is None:
+            return None
+        return stack_desc["StackStatus"]
 
-    def describe_stack(self, stack):
+    def stack_exists(self, stack):
         """
-        Return stack details
+        Return true if stack exists in AWS
         :param stack: stack name
         :return:
         """
-        if stack not in self.list_stacks():
-            raise CloudFormationError("No such stack: %s" % stack)
+        return self.stack_status(stack) is not None
 
-        # query API
-        stack_desc = self.client.describe_stacks(StackName=stack)['Stacks'][0]
+    def describe_stack_events(self, stack, last_event_id=None, limit=None):
+        """
+        Return stack events in chronological order
+        :param stack: stack name
+        :param last_event_id: id of the most recent event already known
+        :param limit: maximum number of (most recent) events to return
+        :return:
+        """
+        return list(self.iter_stack_events(stack, last_event_id, limit))[::-1]
 
-        # Parameters is optional
-        params = stack_desc.get('Parameters', [])
+    def iter_stack_events(self, stack, last_event_id=None, limit=None):
+        """
+        Yield stack events newest first, fetching pages as they are consumed
 
-        # Outputs is optional
-        outputs = stack_desc.get('Outputs', [])
+        The API returns events newest first so paging stops as soon as the
+        last known event or the limit is reached.
+        :param stack: stack name
+        :param last_event_id: id of the most recent event already known
+        :param limit: maximum number of (most recent) events to yield
+        :return:
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        paginator = self.client.get_paginator('describe_stack_events')
+        count = 0
 
-        # at least resources is always present
-        resources = self.client.list_stack_resources(StackName=stack)['StackResourceSummaries']
+        try:
+            for page in paginator.paginate(StackName=stack):
+                for raw_event in page["StackEvents"]:
+                    if raw_event["EventId"] == last_event_id:
+                        return
+                    yield raw_event
+
+                    # do not fetch another page once the limit is reached
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+        except ClientError as err:
+            if "does not exist" in str(err):
+                raise CloudFormationError("No such stack: %s" % stack)
+            raise err
 
+    def describe_stack(self, stack, resources=True, stack_desc=None):
+        """
+        Return stack details
+        :param stack: stack name
+        :param resources: include stack resources
+        :param stack_desc: raw stack description if already known
+        :return:
+        """
         # output json
         stack_data = {
             "Parameters": {},
             "Outputs": {},
             "Resources": {},
         }
-        if params:
-            for param in params:
-                stack_data['Parameters'].update({param['ParameterKey']: param['ParameterValue']})
+        for section, key, value in self.iter_stack_details(stack, resources, stack_desc):
+            stack_data[section][key] = value
 
-        if outputs:
-            for output in outputs:
-                stack_data['Outputs'].update({output['OutputKey']: output['OutputValue']})
+        return stack_data
+
+    def iter_stack_details(self, stack, resources=True, stack_desc=None):
+        """
+        Yield parameters, outputs and resources of a stack as (section, key, value)
+        Resources are fetched page by page as they are consumed.
+        :param stack: stack name
+        :param resources: include stack resources
+        :param stack_desc: raw stack description if already known
+        :return:
+        """
+        # query API
+        if stack_desc is None:
+            stack_desc = self.stack_description(stack)
+        if stack_desc is None:
+            raise CloudFormationError("No such stack: %s" % stack)
+
+        # Parameters and Outputs are optional
+        for param in stack_desc.get('Parameters', []):
+            yield 'Parameters', param['ParameterKey'], param['ParameterValue']
+
+        for output in stack_desc.get('Outputs', []):
+            yield 'Outputs', output['OutputKey'], output['OutputValue']
 
         if resources:
-            for resource in resources:
-                stack_data['Resources'].update({resource['LogicalResourceId']: {
+            for resource in self.iter_stack_resources(stack):
+                yield 'Resources', resource['LogicalResourceId'], {
                     'ResourceType': resource['ResourceType'],
                     'PhysicalResourceId': resource.get('PhysicalResourceId')
-                }})
+                }
 
-        return stack_data
+    def iter_stack_resources(self, stack):
+        """
+        Yield resource summaries of a stack, fetching pages as they are consumed
+        :param stack: stack name
+        :return:
+        """
+        paginator = self.client.get_paginator('list_stack_resources')
+        for page in paginator.paginate(StackName=stack):
+            yield from page['StackResourceSummaries']
 
     def create_stack(self, name, template, parameters):
         """
@@ -144,11 +299,12 @@ class CloudFormation:
         """
         self.client.create_stack(
             StackName=name,
-            TemplateBody=template.as_string(),
             Parameters=parameters.as_list(),
             Capabilities=CAPABILITIES,
-            OnFailure="DELETE"
+            OnFailure="DELETE",
+            **self._template_source(template.as_string())
         )
+        self.invalidate_stacks()
 
     def update_stack(self, name, template, parameters):
         """
@@ -162,10 +318,11 @@ class CloudFormation:
         """
         stack = self._get_resource("cloudformation").Stack(name)
         stack.update(
-            TemplateBody=template.as_string(),
             Parameters=parameters.as_list(),
-            Capabilities=CAPABILITIES
+            Capabilities=CAPABILITIES,
+            **self._template_source(template.as_string())
         )
+        self.invalidate_stacks()
 
     def delete_stack(self, name):
         """
@@ -175,6 +332,7 @@ class CloudFormation:
         """
         stack = self._get_resource("cloudformation").Stack(name)
         stack.delete()
+        self.invalidate_stacks()
 
     def get_template(self, stack):
         """
@@ -201,40 +359,37 @@ class CloudFormation:
         :return:
         """
         set_type = "CREATE"
-        stacks = self.list_stacks()
-        if stack in stacks and stacks[stack] != "REVIEW_IN_PROGRESS":
+        status = self.stack_status(stack)
+        if status is not None and status != "REVIEW_IN_PROGRESS":
             set_type = "UPDATE"
 
+        optional = {}
         description = kwargs.get("description")
         if description:
-            response = self.client.create_change_set(
-                StackName=stack,
-                TemplateBody=template,
-                Parameters=parameters,
-                Capabilities=CAPABILITIES,
-                ChangeSetName=set_name,
-                ChangeSetType=set_type,
-                Description=description
-            )
-        else:
-            response = self.client.create_change_set(
-                StackName=stack,
-                TemplateBody=template,
-                Parameters=parameters,
-                Capabilities=CAPABILITIES,
-                ChangeSetName=set_name,
-                ChangeSetType=set_type
-            )
+            optional["Description"] = description
+
+        response = self.client.create_change_set(
+            StackName=stack,
+            Parameters=parameters,
+            Capabilities=CAPABILITIES,
+            ChangeSetName=set_name,
+            ChangeSetType=set_type,
+            **self._template_source(template),
+            **optional
+        )
         LOG.info("Created change set: %s", response["Id"])
+        if set_type == "CREATE":
+            self.invalidate_stacks()
 
     def list_change_sets(self, stack):
         """
-        Retun a list of change sets
+        Yield change set summaries, fetching pages as they are consumed
         :param stack:
         :return:
         """
-        raw_change_sets = self.client.list_change_sets(StackName=stack)
-        return raw_change_sets["Summaries"]
+        paginator = self.client.get_paginator('list_change_sets')
+        for page in paginator.paginate(StackName=stack):
+            yield from page["Summaries"]
 
     def describe_change_set(self, stack, name):
         """
@@ -243,10 +398,17 @@ class CloudFormation:
         :param name:
         :return:
         """
-        return self.client.describe_change_set(
-            StackName=stack,
-            ChangeSetName=name
-        )
+        return merge_change_set_pages(self.iter_change_set_pages(stack, name))
+
+    def iter_change_set_pages(self, stack, name):
+        """
+        Yield pages of a change set description as they are fetched
+        :param stack:
+        :param name:
+        :return:
+        """
+        paginator = self.client.get_paginator('describe_change_set')
+        yield from paginator.paginate(StackName=stack, ChangeSetName=name)
 
     def delete_change_set(self, stack, name):
         """
@@ -271,6 +433,7 @@ class CloudFormation:
             StackName=stack,
             ChangeSetName=name
         )
+        self.invalidate_stacks()
 
     def validate(self, tpl_body):
         """
@@ -279,6 +442,6 @@ class CloudFormation:
         :return:
         """
         try:
-            self.client.validate_template(TemplateBody=tpl_body)
+            self.client.validate_template(**self._template_source(tpl_body))
         except ClientError as err:
             raise CloudFormationError(err)
@@ -0,0 +1,169 @@
+""" Persistent cache of remote stack metadata """
+
+import json
+import logging
+import sqlite3
+from time import time
+
+from clouds_aws.cache import cache_path
+from clouds_aws.remote_stack.aws_client import CloudFormationError
+
+LOG = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stack_lists (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (profile, region)
+);
+CREATE TABLE IF NOT EXISTS stacks (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    stack TEXT NOT NULL,
+    version TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (profile, region, stack)
+);
+CREATE TABLE IF NOT EXISTS template_digests (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    stack TEXT NOT NULL,
+    version TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (profile, region, stack)
+);
+"""
+
+
+class MetadataCacheError(CloudFormationError):
+    """ Requested data is not cached (and may not be fetched) """
+    pass
+
+
+class MetadataCache:
+    """
+    Stack list and stack details cached in SQLite (~/.cache/clouds-aws/metadata.sqlite)
+
+    Offers list_stacks and describe_stack like CloudFormation. Entries younger
+    than max_age are served as they are. Older stack details are revalidated
+    with a single describe_stacks call and only fetched again if the stack's
+    LastUpdatedTime (or status) changed. In offline mode the API is never called.
+    """
+
+    def __init__(self, cfn, max_age=0, offline=False):
+        """
+        Initialize cache
+        :type cfn: CloudFormation
+        :param cfn: CloudFormation client object
+        :param max_age: seconds cached entries are served without revalidation
+        :param offline: serve cached entries only
+        """
+        self.cfn = cfn
+        self.max_age = max_age
+        self.offline = offline
+        self.key = (cfn.profile or "", cfn.client.meta.region_name or "")
+
+        self.db = sqlite3.connect(cache_path("metadata.sqlite"), timeout=10)
+        self.db.executescript(SCHEMA)
+
+    def __repr__(self):
+        return "MetadataCache({}, {})".format(*self.key)
+
+    def list_stacks(self):
+        """
+        Return all remote stacks
+        :return: dict of stack name to status
+        """
+        row = self.db.execute(
+            "SELECT fetched, data FROM stack_lists WHERE profile = ? AND region = ?",
+            self.key).fetchone()
+        if row and self._fresh(row[0]):
+            return json.loads(row[1])
+
+        if self.offline:
+            raise MetadataCacheError("Stack list of %s/%s is not cached" % self.key)
+
+        stacks = self.cfn.list_stacks(refresh=True)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO stack_lists VALUES (?, ?, ?, ?)",
+                            self.key + (time(), json.dumps(stacks)))
+        return stacks
+
+    def describe_stack(self, stack, resources=True):  # pylint: disable=unused-argument
+        """
+        Return stack details (see CloudFormation.describe_stack)
+        Resources are always cached along with the stack.
+        :param stack: stack name
+        :param resources: unused, resources are always included
+        :return:
+        """
+        row = self.db.execute(
+            "SELECT version, fetched, data FROM stacks "
+            "WHERE profile = ? AND region = ? AND stack = ?", self.key + (stack,)).fetchone()
+        if row and self._fresh(row[1]):
+            return json.loads(row[2])
+
+        if self.offline:
+            raise MetadataCacheError("Stack %s is not cached" % stack)
+
+        # revalidate
+        stack_desc = self.cfn.stack_description(stack)
+        if stack_desc is None:
+            raise CloudFormationError("No such stack: %s" % stack)
+
+        version = stack_version(stack_desc)
+        if row and row[0] == version:
+            LOG.debug("Stack %s is unchanged (%s)", stack, version)
+            data = row[2]
+        else:
+            data = json.dumps(self.cfn.describe_stack(stack, stack_desc=stack_desc))
+
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO stacks VALUES (?, ?, ?, ?, ?, ?)",
+                            self.key + (stack, version, time(), data))
+        return json.loads(data)
+
+    def template_digest(self, stack_desc):
+        """
+        Return digest of a stack's template stored for its current version
+        :param stack_desc: raw stack description
+        :return: digest (None if not stored or the stack has been updated since)
+        """
+        row = self.db.execute(
+            "SELECT digest FROM template_digests "
+            "WHERE profile = ? AND region = ? AND stack = ? AND version = ?",
+            self.key + (stack_desc["StackName"], stack_version(stack_desc))).fetchone()
+        return row[0] if row else None
+
+    def store_template_digest(self, stack_desc, digest):
+        """
+        Store digest of a stack's template for its current version
+        :param stack_desc: raw stack description
+        :param digest: template digest
+        :return:
+        """
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO template_digests VALUES (?, ?, ?, ?, ?)",
+                            self.key + (stack_desc["StackName"], stack_version(stack_desc),
+                                        digest))
+
+    def _fresh(self, fetched):
+        """
+        Return true if an entry fetched at the given time may be served as it is
+        :param fetched: unix timestamp
+        :return:
+        """
+        return self.offline or time() - fetched < self.max_age
+
+
+def stack_version(stack_desc):
+    """
+    Return version of a stack, stacks change with an update (or while it is in progress)
+    :param stack_desc: raw stack description
+    :return:
+    """
+    return "%s %s" % (stack_desc.get("LastUpdatedTime") or stack_desc["CreationTime"],
+                      stack_desc["StackStatus"])
@@ -0,0 +1,87 @@
+""" Polling intervals and deadlines for waiting on AWS """
+
+import logging
+from random import uniform
+from time import sleep, time
+
+LOG = logging.getLogger(__name__)
+
+INITIAL_INTERVAL = 2
+MAXIMUM_INTERVAL = 30
+BACKOFF_FACTOR = 1.5
+
+# fraction of an interval randomly cut off to spread requests of concurrent clients
+JITTER = 0.2
+
+THROTTLING_ERRORS = ("Throttling", "ThrottlingException", "RequestLimitExceeded",
+                     "TooManyRequestsException")
+
+
+class PollingPolicy:
+    """
+    Polling policy shared by everything that waits for AWS
+
+    Polls fast at first and backs off exponentially as long as nothing
+    changes. Throttling backs off to the maximum interval at once. An optional
+    deadline limits the overall time spent waiting.
+    """
+
+    def __init__(self, timeout=None, initial=INITIAL_INTERVAL, maximum=MAXIMUM_INTERVAL,
+                 factor=BACKOFF_FACTOR):
+        """
+        Initialize polling policy, the deadline starts now
+        :param timeout: seconds to wait at most (None: wait forever)
+        :param initial: seconds between polls after a change
+        :param maximum: maximum seconds between polls
+        :param factor: interval growth per poll without change
+        """
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.deadline = time() + timeout if timeout else None
+        self.interval = initial
+
+    def __repr__(self):
+        return "PollingPolicy({}, {}, {})".format(self.initial, self.maximum, self.factor)
+
+    def expired(self):
+        """
+        Return true if the deadline has passed
+        :return:
+        """
+        return self.deadline is not None and time() >= self.deadline
+
+    def sleep(self, changed=False):
+        """
+        Sleep until the next poll (never beyond the deadline)
+        :param changed: the last poll saw a change
+        :return:
+        """
+        if changed:
+            self.interval = self.initial
+
+        delay = self.interval * uniform(1 - JITTER, 1)
+        if self.deadline is not None:
+            delay = max(min(delay, self.deadline - time()), 0)
+
+        LOG.debug("Sleeping %.1fs before polling again", delay)
+        sleep(delay)
+        self.interval = min(self.interval * self.factor, self.maximum)
+
+    def throttled(self):
+        """
+        Back off to the maximum interval after being throttled
+        :return:
+        """
+        LOG.warning("Throttled by AWS, polling every %ds", self.maximum)
+        self.interval = self.maximum
+
+
+def is_throttling(err):
+    """
+    Return true if a botocore ClientError is a throttling error
+    :param err: exception
+    :return:
+    """
+    response = getattr(err, "response", None) or {}
+    return response.get("Error", {}).get("Code") in THROTTLING_ERRORS
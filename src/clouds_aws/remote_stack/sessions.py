@@ -0,0 +1,129 @@
+""" Process wide registry of boto3 sessions and clients """
+
+import logging
+from fnmatch import fnmatchcase
+from threading import Lock, local
+
+import boto3
+from botocore.config import Config
+
+LOG = logging.getLogger(__name__)
+
+# client side rate limiting and retries with backoff when being throttled
+CLIENT_CONFIG = Config(
+    retries={"mode": "adaptive", "max_attempts": 10},
+    max_pool_connections=50
+)
+
+_SESSIONS = {}
+_CLIENTS = {}
+_LOCK = Lock()
+
+# boto3 resources are not thread safe and are therefore kept per thread
+_THREAD_LOCAL = local()
+
+GLOB_CHARS = "*?["
+
+
+def get_session(profile):
+    """
+    Return shared boto3 session for a profile
+    :param profile: AWS config profile name (None: use environment)
+    :return:
+    """
+    with _LOCK:
+        return _get_session(profile)
+
+
+def _get_session(profile):
+    """
+    Return shared boto3 session (caller must hold the lock)
+    :param profile: AWS config profile name
+    :return:
+    """
+    if profile not in _SESSIONS:
+        LOG.debug("Creating session for profile %s", profile)
+        _SESSIONS[profile] = boto3.Session(profile_name=profile)
+    return _SESSIONS[profile]
+
+
+def get_client(service, region, profile):
+    """
+    Return shared (thread safe) client for a service
+    :param service: AWS service name
+    :param region: AWS region
+    :param profile: AWS config profile name
+    :return:
+    """
+    key = (profile, region, service)
+    with _LOCK:
+        if key not in _CLIENTS:
+            LOG.debug("Creating %s client for profile %s in region %s", service, profile, region)
+            _CLIENTS[key] = _get_session(profile).client(service, region, config=CLIENT_CONFIG)
+        return _CLIENTS[key]
+
+
+def get_resource(service, region, profile):
+    """
+    Return service resource shared within the current thread
+    :param service: AWS service name
+    :param region: AWS region
+    :param profile: AWS config profile name
+    :return:
+    """
+    if not hasattr(_THREAD_LOCAL, "resources"):
+        _THREAD_LOCAL.resources = {}
+
+    key = (profile, region, service)
+    if key not in _THREAD_LOCAL.resources:
+        # sessions must not be used concurrently, so hold the lock while creating
+        with _LOCK:
+            _THREAD_LOCAL.resources[key] = _get_session(profile).resource(
+                service, region, config=CLIENT_CONFIG)
+    return _THREAD_LOCAL.resources[key]
+
+
+def expand_profiles(pattern):
+    """
+    Return profile names matching comma separated names or globs
+    :param pattern: e.g. "prod-*,shared" (None: use environment)
+    :return: list of profile names
+    """
+    if pattern is None:
+        return [None]
+
+    return _expand(pattern, lambda: get_session(None).available_profiles)
+
+
+def expand_regions(pattern, profile):
+    """
+    Return CloudFormation regions matching comma separated names or globs
+    :param pattern: e.g. "eu-*,us-east-1" (None: use environment)
+    :param profile: AWS config profile name (determines the partition)
+    :return: list of region names
+    """
+    if pattern is None:
+        return [None]
+
+    return _expand(pattern, lambda: get_session(profile).get_available_regions("cloudformation"))
+
+
+def _expand(pattern, available):
+    """
+    Return names matching comma separated names or globs
+    :param pattern: comma separated names or globs
+    :param available: function returning all names globs are matched against
+    :return: list of names (in order of the pattern, without duplicates)
+    """
+    names = []
+    for item in pattern.split(","):
+        item = item.strip()
+        if not any(char in item for char in GLOB_CHARS):
+            matches = [item] if item else []
+        else:
+            matches = sorted(name for name in available() if fnmatchcase(name, item))
+            if not matches:
+                LOG.warning("Nothing matches %s", item)
+        names.extend(name for name in matches if name not in names)
+
+    return names
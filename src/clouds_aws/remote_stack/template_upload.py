@@ -0,0 +1,134 @@
+""" Upload of templates too large to be sent inline """
+
+import logging
+from hashlib import sha256
+from threading import Lock
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+
+from clouds_aws.remote_stack.sessions import get_client
+
+LOG = logging.getLogger(__name__)
+
+# maximum size of a template sent as TemplateBody (bytes)
+TEMPLATE_BODY_LIMIT = 51200
+
+# maximum size of a template passed by TemplateURL (bytes)
+TEMPLATE_URL_LIMIT = 1024 * 1024
+
+DEFAULT_PREFIX = "clouds-aws/templates"
+
+# bucket (None: do not upload) and key prefix large templates are uploaded to (see configure)
+_SETTINGS = {"bucket": None, "prefix": DEFAULT_PREFIX}
+
+# objects known to exist, shared by all threads of this process
+_UPLOADED = set()
+_LOCK = Lock()
+
+
+class TemplateSizeError(Exception):
+    """ Raised for templates too large for CloudFormation """
+    pass
+
+
+def configure(bucket=None, prefix=None):
+    """
+    Set where templates too large to be sent inline are uploaded to
+    :param bucket: bucket name (None: do not upload)
+    :param prefix: key prefix (default: clouds-aws/templates)
+    :return:
+    """
+    _SETTINGS["bucket"] = bucket
+    _SETTINGS["prefix"] = (prefix or DEFAULT_PREFIX).strip("/")
+
+
+def template_source(body, region, profile):
+    """
+    Return API arguments passing a template inline or by URL
+    Templates above the inline limit are uploaded to the configured bucket.
+    :param body: template string
+    :param region: aws region
+    :param profile: aws profile name
+    :raises TemplateSizeError: if the template is too large to be passed by URL
+    :return: dict with either TemplateBody or TemplateURL
+    """
+    data = body.encode("utf-8")
+    if len(data) <= TEMPLATE_BODY_LIMIT:
+        return {"TemplateBody": body}
+
+    if len(data) > TEMPLATE_URL_LIMIT:
+        raise TemplateSizeError("Template has %d bytes, more than CloudFormation accepts (%d)"
+                                % (len(data), TEMPLATE_URL_LIMIT))
+
+    bucket = _SETTINGS["bucket"]
+    if not bucket:
+        LOG.warning("Template has %d bytes, more than can be sent inline (%d). Set a bucket with "
+                    "--template-bucket or CLOUDS_AWS_TEMPLATE_BUCKET to upload it", len(data),
+                    TEMPLATE_BODY_LIMIT)
+        return {"TemplateBody": body}
+
+    return {"TemplateURL": upload_template(data, bucket, region, profile)}
+
+
+def upload_template(data, bucket, region, profile):
+    """
+    Upload template unless an identical one has been uploaded before
+    Objects are named by the digest of their content.
+    :param data: template as bytes
+    :param bucket: bucket name
+    :param region: aws region
+    :param profile: aws profile name
+    :return: template URL
+    """
+    s3_client = get_client("s3", region, profile)
+    key = "%s/%s.template" % (_SETTINGS["prefix"], sha256(data).hexdigest())
+
+    with _LOCK:
+        uploaded = (bucket, key) in _UPLOADED
+
+    if uploaded or object_exists(s3_client, bucket, key):
+        LOG.debug("Template s3://%s/%s has been uploaded before", bucket, key)
+    else:
+        LOG.info("Uploading template to s3://%s/%s", bucket, key)
+        s3_client.put_object(Bucket=bucket, Key=key, Body=data)
+
+    with _LOCK:
+        _UPLOADED.add((bucket, key))
+
+    return template_url(s3_client, bucket, key)
+
+
+def object_exists(s3_client, bucket, key):
+    """
+    Return true if an object exists
+    :param s3_client: S3 client
+    :param bucket: bucket name
+    :param key: object key
+    :return:
+    """
+    try:
+        s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as err:
+        if err.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise err
+
+    return True
+
+
+def template_url(s3_client, bucket, key):
+    """
+    Return URL of an object as expected by CloudFormation
+    Custom endpoints (e.g. a local S3 stand-in) are addressed path style.
+    :param s3_client: S3 client
+    :param bucket: bucket name
+    :param key: object key
+    :return:
+    """
+    endpoint = s3_client.meta.endpoint_url.rstrip("/")
+    if endpoint.endswith(".amazonaws.com"):
+        return "https://%s.s3.%s.amazonaws.com/%s" % (bucket, s3_client.meta.region_name,
+                                                     quote(key))
+
+    return "%s/%s/%s" % (endpoint, bucket, quote(key))
@@ -0,0 +1,181 @@
+""" Wait for operations on many stacks in a single loop """
+
+import logging
+from collections import namedtuple
+
+from botocore.exceptions import ClientError
+
+from clouds_aws.remote_stack import RemoteStackError
+from clouds_aws.remote_stack.aws_client import CloudFormation
+from clouds_aws.remote_stack.polling import PollingPolicy, is_throttling
+
+LOG = logging.getLogger(__name__)
+
+SUCCESS_STATES = ("CREATE_COMPLETE", "UPDATE_COMPLETE", "IMPORT_COMPLETE")
+
+# status reported for stacks that do not exist (anymore)
+DELETED = "DELETE_COMPLETE"
+
+# status reported for stacks still in progress when the deadline passed
+TIMED_OUT = "TIMED_OUT"
+
+# outcome of waiting for a stack
+# stack: stack name, status: final stack status, success: operation succeeded,
+# events: events of the stack received while waiting
+WaitResult = namedtuple("WaitResult", ["stack", "status", "success", "events"])
+
+
+class StackWaiter:
+    """
+    Wait for stacks to reach a stable state
+
+    Every tick checks the status of all stacks waited for with a single
+    describe_stacks sweep. Events are only fetched for stacks whose status
+    changed (or on every tick for stacks whose events are displayed).
+    """
+
+    def __init__(self, region, profile, policy=None):
+        """
+        Initialize waiter
+        :param region: aws region
+        :param profile: aws profile name
+        :type policy: PollingPolicy
+        :param policy: polling intervals and deadline (default: no deadline)
+        """
+        self.cfn = CloudFormation(region, profile)
+        self.policy = policy or PollingPolicy()
+        self._stacks = {}
+        self._changed = False
+
+    def __repr__(self):
+        return "StackWaiter({}, {})".format(self.cfn.region, self.cfn.profile)
+
+    def __len__(self):
+        return len(self._stacks)
+
+    def add(self, stack, on_events=None, deleting=False):
+        """
+        Start waiting for a stack
+        Events newer than the events already loaded into the stack are reported.
+        :type stack: RemoteStack
+        :param stack: remote stack
+        :param on_events: function called with stack and new events on every tick (live display)
+        :param deleting: the stack is being deleted (deletion is success)
+        :return:
+        """
+        self._stacks[stack.name] = {
+            "stack": stack,
+            "on_events": on_events,
+            "deleting": deleting,
+            "status": None,
+            "events": [],
+        }
+
+    def poll(self):
+        """
+        Check all stacks once
+        :return: list of WaitResult of the stacks that reached a stable state
+        """
+        if not self._stacks:
+            return []
+
+        statuses = self._statuses()
+        finished = []
+        self._changed = False
+        for name, state in sorted(self._stacks.items()):
+            status = statuses.get(name) or DELETED
+            in_progress = status.endswith("_IN_PROGRESS")
+
+            if status != state["status"] or (in_progress and state["on_events"]):
+                new_events = self._fetch_events(state)
+                self._changed = self._changed or status != state["status"] or bool(new_events)
+            state["status"] = status
+
+            if not in_progress:
+                LOG.debug("Stack %s reached state %s", name, status)
+                success = status in SUCCESS_STATES or (state["deleting"] and status == DELETED)
+                finished.append(WaitResult(name, status, success, state["events"]))
+
+        for result in finished:
+            del self._stacks[result.stack]
+
+        return finished
+
+    def wait_any(self):
+        """
+        Wait until at least one stack reached a stable state or the deadline passed
+        :return: list of WaitResult of the stacks that reached a stable state (or timed out)
+        """
+        while self._stacks:
+            try:
+                finished = self.poll()
+            except ClientError as err:
+                if not is_throttling(err):
+                    raise err
+                self.policy.throttled()
+                finished = []
+
+            if finished:
+                return finished
+
+            if self.policy.expired():
+                return self._time_out()
+
+            self.policy.sleep(self._changed)
+
+        return []
+
+    def wait(self):
+        """
+        Wait until all stacks reached a stable state
+        :return: dict of stack name to WaitResult
+        """
+        results = {}
+        while self._stacks:
+            for result in self.wait_any():
+                results[result.stack] = result
+
+        return results
+
+    def _time_out(self):
+        """
+        Stop waiting for all stacks
+        :return: list of WaitResult of the stacks still in progress
+        """
+        timed_out = []
+        for name, state in sorted(self._stacks.items()):
+            LOG.warning("Timed out waiting for stack %s (%s)", name, state["status"])
+            timed_out.append(WaitResult(name, TIMED_OUT, False, state["events"]))
+
+        self._stacks.clear()
+        return timed_out
+
+    def _statuses(self):
+        """
+        Return current status of the stacks waited for (None if a stack does not exist)
+        A single stack is described directly, several stacks by one sweep over all stacks.
+        :return: dict of stack name to status
+        """
+        if len(self._stacks) == 1:
+            name = next(iter(self._stacks))
+            return {name: self.cfn.stack_status(name)}
+
+        return self.cfn.list_stacks(refresh=True)
+
+    @staticmethod
+    def _fetch_events(state):
+        """
+        Fetch new events of a stack and pass them on
+        :param state: stack state
+        :return: list of new events
+        """
+        try:
+            new_events = state["stack"].poll_events()
+        except RemoteStackError as err:
+            LOG.debug(err)
+            return []
+
+        state["events"].extend(new_events)
+        if new_events and state["on_events"]:
+            state["on_events"](state["stack"], new_events)
+        return new_events
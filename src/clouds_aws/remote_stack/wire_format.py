@@ -0,0 +1,151 @@
+""" Compact wire format of templates sent to the API """
+
+import json
+import logging
+import re
+from datetime import date, datetime
+
+try:
+    from json import JSONDecodeError
+except ImportError:
+    JSONDecodeError = ValueError
+
+from clouds_aws.local_stack.helpers import YAMLLoadError, load_yaml
+
+LOG = logging.getLogger(__name__)
+
+# send templates minified (see configure)
+_SETTINGS = {"minify": False}
+
+# YAML short form intrinsic functions that have a JSON long form
+SHORT_FORM = ("And", "Base64", "Cidr", "Condition", "Equals", "FindInMap", "GetAZs", "GetAtt",
+              "If", "ImportValue", "Join", "Length", "Not", "Or", "Ref", "Select", "Split", "Sub",
+              "ToJsonString", "Transform")
+
+# JSON strings (kept as they are) or whitespace between tokens (dropped)
+JSON_TOKEN = re.compile(r'("(?:\\.|[^"\\])*")|\s+')
+
+# plain scalars loaded as strings (YAML 1.2) that CloudFormation (YAML 1.1) reads differently
+YAML11_SCALAR = re.compile(r"^(?:[yYnN]|yes|Yes|YES|no|No|NO|on|On|ON|off|Off|OFF"
+                           r"|[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+(?:\.[0-9_]*)?)$")
+
+
+class NotLossless(Exception):
+    """ Template cannot be converted to JSON without changing its meaning """
+    pass
+
+
+def configure(minify_templates=False):
+    """
+    Set whether templates are sent minified (opt-in by --minify or CLOUDS_AWS_MINIFY)
+    :param minify_templates: send templates minified
+    :return:
+    """
+    _SETTINGS["minify"] = minify_templates
+
+
+def minify_enabled():
+    """
+    Return true if templates are to be sent minified
+    :return:
+    """
+    return _SETTINGS["minify"]
+
+
+def minify(template):
+    """
+    Return template as compact JSON
+    JSON templates lose their whitespace only. YAML templates are converted
+    if that is lossless and the result is smaller, otherwise they are
+    returned unchanged.
+    :param template: template string
+    :return:
+    """
+    try:
+        json.loads(template)
+    except JSONDecodeError:
+        pass
+    else:
+        return JSON_TOKEN.sub(lambda match: match.group(1) or "", template)
+
+    try:
+        tree = _json_tree(load_yaml(template))
+    except (YAMLLoadError, NotLossless) as err:
+        LOG.debug("Sending YAML template as it is: %s", err)
+        return template
+
+    if not isinstance(tree, dict):
+        return template
+
+    compact = json.dumps(tree, ensure_ascii=False, separators=(",", ":"))
+    if len(compact.encode("utf-8")) >= len(template.encode("utf-8")):
+        return template
+
+    return compact
+
+
+def _json_tree(node):
+    """
+    Return YAML node as JSON compatible tree (short form functions in long form)
+    :param node: YAML node
+    :raises NotLossless: if the node has no exact JSON equivalent
+    :return:
+    """
+    tag = getattr(getattr(node, "tag", None), "value", None)
+    if tag and tag.startswith("!"):
+        function = tag[1:]
+        if function not in SHORT_FORM:
+            raise NotLossless("Unknown tag %s" % tag)
+
+        value = _json_tree(getattr(node, "value", None)) if not isinstance(node, (dict, list)) \
+            else _json_untagged(node)
+        if function == "GetAtt" and isinstance(value, str):
+            value = value.split(".", 1)
+        if function in ("Ref", "Condition"):
+            return {function: value}
+        return {"Fn::" + function: value}
+
+    return _json_untagged(node)
+
+
+def _json_untagged(node):  # pylint: disable=too-many-return-statements
+    """
+    Return YAML node as JSON compatible tree without regard to its tag
+    :param node: YAML node
+    :raises NotLossless: if the node has no exact JSON equivalent
+    :return:
+    """
+    if isinstance(node, dict):
+        if not all(isinstance(key, str) for key in node):
+            raise NotLossless("Mapping with non-string keys")
+        return {_json_untagged(key): _json_tree(value) for key, value in node.items()}
+
+    if isinstance(node, list):
+        return [_json_tree(value) for value in node]
+
+    if isinstance(node, str):
+        # quoted strings are loaded as str subclasses and mean the same to every parser
+        if type(node) is str and YAML11_SCALAR.match(node):  # pylint: disable=unidiomatic-typecheck
+            raise NotLossless("Ambiguous plain scalar %r" % node)
+        return str(node)
+
+    if node is None or isinstance(node, bool):
+        return node
+
+    # integers keep their notation as int subclasses (e.g. ScalarInt for 0)
+    if isinstance(node, int):
+        # loaded by load_yaml already
+        from ruamel.yaml.scalarint import BinaryInt, HexInt, OctalInt  # pylint: disable=import-outside-toplevel
+
+        if isinstance(node, OctalInt):
+            raise NotLossless("Octal integer %r is a string in YAML 1.1" % node)
+        width = getattr(node, "_width", None)
+        if not isinstance(node, (BinaryInt, HexInt)) and width and width > len(str(abs(node))):
+            raise NotLossless("Integer %r with leading zeros is octal in YAML 1.1" % node)
+        return int(node)
+
+    # dates like AWSTemplateFormatVersion are strings to CloudFormation
+    if isinstance(node, date) and not isinstance(node, datetime):
+        return node.isoformat()
+
+    raise NotLossless("Scalar %r of type %s" % (node, type(node).__name__))
@@ -0,0 +1,73 @@
+""" Tests of the apply command """
+
+from argparse import Namespace
+
+from clouds_aws.cli import apply
+from clouds_aws.remote_stack.waiter import TIMED_OUT, WaitResult
+
+
+class FakePolicy:  # pylint: disable=too-few-public-methods
+    """ Polling policy whose deadline is set by the test """
+
+    def __init__(self):
+        self.deadline_passed = False
+
+    def expired(self):
+        """ Return true once the deadline has been set to pass """
+        return self.deadline_passed
+
+
+class FakeCloudFormation:  # pylint: disable=too-few-public-methods
+    """ CloudFormation client without any stacks """
+
+    @staticmethod
+    def list_stacks():
+        """ Return empty stack index """
+        return {}
+
+
+class FakeWaiter:
+    """ Waiter timing out all stacks once the deadline has passed """
+
+    def __init__(self, region, profile, policy):  # pylint: disable=unused-argument
+        self.cfn = FakeCloudFormation()
+        self.policy = FakePolicy()
+        self.stacks = []
+
+    def __len__(self):
+        return len(self.stacks)
+
+    def add(self, stack):
+        """ Watch a stack """
+        self.stacks.append(stack)
+
+    def wait_any(self):
+        """ Return the stacks timed out (the deadline passes while waiting for the first) """
+        self.policy.deadline_passed = True
+        timed_out = [WaitResult(stack, TIMED_OUT, False, []) for stack in self.stacks]
+        self.stacks = []
+        return timed_out
+
+
+def test_no_stacks_started_after_timeout(monkeypatch):
+    """ Pending stacks are reported as not started once the timeout expired """
+    started = []
+
+    def start_stack(args, local_stack, exists, waiter):  # pylint: disable=unused-argument
+        started.append(local_stack)
+        waiter.add(local_stack)
+
+    monkeypatch.setattr(apply, "StackWaiter", FakeWaiter)
+    monkeypatch.setattr(apply, "start_stack", start_stack)
+    args = Namespace(region="eu-west-1", profile=None, timeout=60, jobs=1)
+    order = ["first", "second", "third"]
+
+    results = apply.apply_stacks(args, {name: name for name in order},
+                                 {name: set() for name in order}, order)
+
+    assert started == ["first"]
+    assert results == {
+        "first": WaitResult("first", TIMED_OUT, False, []),
+        "second": WaitResult("second", apply.NOT_STARTED, False, []),
+        "third": WaitResult("third", apply.NOT_STARTED, False, []),
+    }
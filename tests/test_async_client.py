@@ -0,0 +1,353 @@
+""" Tests of the asyncio backend on a stubbed aiobotocore session """
+
+import asyncio
+import logging
+from argparse import Namespace
+from contextlib import asynccontextmanager
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from clouds_aws.cli import common, dump, status, validate
+from clouds_aws.cli import list as list_cmd
+from clouds_aws.remote_stack import async_client
+from clouds_aws.remote_stack.aws_client import CloudFormationError
+
+REGION = "eu-west-1"
+
+# seconds every request takes
+DELAY = 0.01
+
+# items per page of paginated operations
+PAGE_SIZE = 2
+
+# result keys of paginated operations
+PAGE_KEYS = {
+    "describe_stacks": "Stacks",
+    "describe_stack_events": "StackEvents",
+    "list_stack_resources": "StackResourceSummaries",
+    "list_change_sets": "Summaries",
+}
+
+TEMPLATE = "Resources:\n  Topic:\n    Type: AWS::SNS::Topic\n"
+
+
+def client_error(operation, code, message):
+    """ Return ClientError as raised by botocore """
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+class FakeBackend:  # pylint: disable=too-many-instance-attributes
+    """
+    CloudFormation API of several regions served to fake aiobotocore clients
+    Requests in flight and requests sent are recorded.
+    """
+
+    def __init__(self):
+        self.stacks = {}
+        self.templates = {}
+        self.events = {}
+        self.denied = set()
+        self.delays = {}
+        self.clients = []
+        self.requests = []
+        self.completed = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def add_stack(self, region, name, template=TEMPLATE, parameters=None):
+        """ Create a stack in a region """
+        self.stacks.setdefault(region, {})[name] = {
+            "StackName": name,
+            "StackStatus": "CREATE_COMPLETE",
+            "CreationTime": "2026-01-01T00:00:00Z",
+            "Parameters": [{"ParameterKey": key, "ParameterValue": value}
+                           for key, value in sorted((parameters or {}).items())],
+        }
+        self.templates[region, name] = template
+
+    def session(self, profile=None):
+        """ Return fake AioSession """
+        return SimpleNamespace(create_client=partial(self.create_client, profile=profile))
+
+    @asynccontextmanager
+    async def create_client(self, service, region_name, config, profile=None):  # pylint: disable=unused-argument
+        """ Yield fake aiobotocore client """
+        self.clients.append((region_name, profile))
+        yield FakeClient(self, region_name)
+
+    async def request(self, region, operation, **kwargs):
+        """ Return response of an operation after a delay """
+        self.requests.append((region, operation, kwargs))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(kwargs.get("StackName"), DELAY))
+            self.completed.append(kwargs.get("StackName"))
+            if region in self.denied:
+                raise client_error(operation, "AccessDenied", "Access denied in %s" % region)
+            return getattr(self, "_" + operation)(region, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+    async def paginate(self, region, operation, **kwargs):
+        """ Yield pages of a paginated operation, each fetched by its own request """
+        key = PAGE_KEYS[operation]
+        start = 0
+        while True:
+            items = (await self.request(region, operation, **kwargs))[key]
+            yield {key: items[start:start + PAGE_SIZE]}
+            start += PAGE_SIZE
+            if start >= len(items):
+                return
+
+    def _stack(self, region, operation, name):
+        """ Return stack description or raise like the API """
+        if name not in self.stacks.get(region, {}):
+            raise client_error(operation, "ValidationError", "Stack with id %s does not exist"
+                               % name)
+        return self.stacks[region][name]
+
+    def _describe_stacks(self, region, StackName=None):  # pylint: disable=invalid-name
+        if StackName:
+            return {"Stacks": [self._stack(region, "DescribeStacks", StackName)]}
+        return {"Stacks": list(self.stacks.get(region, {}).values())}
+
+    def _describe_stack_events(self, region, StackName):  # pylint: disable=invalid-name
+        self._stack(region, "DescribeStackEvents", StackName)
+        return {"StackEvents": self.events.get((region, StackName), [])}
+
+    def _list_stack_resources(self, region, StackName):  # pylint: disable=invalid-name
+        self._stack(region, "ListStackResources", StackName)
+        return {"StackResourceSummaries": []}
+
+    def _get_template(self, region, StackName):  # pylint: disable=invalid-name
+        self._stack(region, "GetTemplate", StackName)
+        return {"TemplateBody": self.templates[region, StackName]}
+
+    @staticmethod
+    def _validate_template(region, TemplateBody):  # pylint: disable=invalid-name,unused-argument
+        if "Invalid" in TemplateBody:
+            raise client_error("ValidateTemplate", "ValidationError", "Template format error")
+        return {}
+
+
+class FakeClient:  # pylint: disable=too-few-public-methods
+    """ aiobotocore client sending its requests to a FakeBackend """
+
+    def __init__(self, backend, region):
+        self.backend = backend
+        self.region = region
+
+    def __getattr__(self, operation):
+        return partial(self.backend.request, self.region, operation)
+
+    def get_paginator(self, operation):
+        """ Return paginator of an operation """
+        return SimpleNamespace(paginate=partial(self.backend.paginate, self.region, operation))
+
+
+@pytest.fixture(name="backend")
+def fixture_backend(monkeypatch):
+    """ Serve the asyncio backend from a FakeBackend instead of aiobotocore """
+    backend = FakeBackend()
+    monkeypatch.setattr(async_client, "AioSession", backend.session)
+    monkeypatch.setattr(async_client, "AioConfig", dict)
+    return backend
+
+
+def async_args(**kwargs):
+    """ Return parser arguments of a command run with --async """
+    return Namespace(**dict({"region": REGION, "profile": None, "use_async": True,
+                             "concurrency": 4}, **kwargs))
+
+
+def test_results_in_order_of_calls(backend):
+    """ Results are returned in order of the calls, not in order of completion """
+    backend.add_stack(REGION, "slow")
+    backend.add_stack(REGION, "fast")
+    backend.add_stack("us-east-1", "other")
+    backend.delays = {"slow": 0.1}
+
+    results = async_client.call_many([
+        (REGION, None, "stack_status", ("slow",)),
+        (REGION, None, "stack_status", ("fast",)),
+        ("us-east-1", None, "stack_status", ("other",)),
+        ("us-east-1", None, "stack_status", ("missing",)),
+    ])
+
+    assert results == ["CREATE_COMPLETE", "CREATE_COMPLETE", "CREATE_COMPLETE", None]
+    assert backend.completed[-1] == "slow"
+    # one client per region and profile
+    assert backend.clients == [(REGION, None), ("us-east-1", None)]
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_concurrency_cap(backend, concurrency):
+    """ Requests in flight, including pages of paginated calls, are bounded """
+    for num in range(12):
+        backend.add_stack(REGION, "stack%d" % num)
+
+    calls = [(REGION, None, "describe_stack", ("stack%d" % num,)) for num in range(12)]
+    calls.append((REGION, None, "list_stacks", ()))
+    results = async_client.call_many(calls, concurrency)
+
+    assert len(results[-1]) == 12
+    assert backend.max_in_flight == concurrency
+    # 12 describe_stacks, 12 list_stack_resources, 6 pages of stacks
+    assert len(backend.requests) == 30
+
+
+@pytest.mark.parametrize("last_event_id,limit,expected,pages", [
+    (None, None, list(range(10)), 5),
+    ("event6", None, [7, 8, 9], 2),
+    (None, 3, [7, 8, 9], 2),
+    ("event8", 3, [9], 1),
+    ("event4", 2, [8, 9], 2),
+])
+def test_events_cutoff(backend, last_event_id, limit, expected, pages):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """ Events are returned in chronological order, no pages are fetched beyond the cutoff """
+    backend.add_stack(REGION, "app")
+    # the API returns events newest first
+    backend.events[REGION, "app"] = [{"EventId": "event%d" % num} for num in range(9, -1, -1)]
+
+    events = async_client.call_many([(REGION, None, "describe_stack_events",
+                                      ("app", last_event_id, limit))])[0]
+
+    assert [event["EventId"] for event in events] == ["event%d" % num for num in expected]
+    assert len(backend.requests) == pages
+
+
+def test_client_errors(backend):
+    """ Errors are returned per call, API errors are mapped to CloudFormationError """
+    backend.add_stack(REGION, "app")
+
+    valid, invalid, events, details, template, stack_status = async_client.call_many([
+        (REGION, None, "validate", (TEMPLATE,)),
+        (REGION, None, "validate", ("Description: Invalid\n" + TEMPLATE,)),
+        (REGION, None, "describe_stack_events", ("missing",)),
+        (REGION, None, "describe_stack", ("missing",)),
+        (REGION, None, "get_template", ("missing",)),
+        (REGION, None, "stack_status", ("app",)),
+    ])
+
+    assert valid is None
+    assert isinstance(invalid, CloudFormationError)
+    assert "Template format error" in str(invalid)
+    assert isinstance(events, CloudFormationError)
+    assert str(events) == "No such stack: missing"
+    assert isinstance(details, CloudFormationError)
+    assert str(details) == "No such stack: missing"
+    # other errors are passed on as they are
+    assert isinstance(template, ClientError)
+    assert stack_status == "CREATE_COMPLETE"
+
+
+def test_unavailable(monkeypatch, caplog):
+    """ Commands bail out if aiobotocore is not installed """
+    monkeypatch.setattr(async_client, "AioSession", None)
+
+    with pytest.raises(async_client.AsyncUnavailable):
+        async_client.call_many([(REGION, None, "list_stacks", ())])
+
+    with pytest.raises(SystemExit) as exit_info:
+        common.call_many(async_args(), [(REGION, None, "list_stacks", ())])
+    assert exit_info.value.code == 1
+    assert "requires aiobotocore" in caplog.text
+
+
+@pytest.fixture(name="workdir")
+def fixture_workdir(tmp_path, monkeypatch):
+    """ Run in an empty directory with an empty cache """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path
+
+
+def write_stack(workdir, name, template=TEMPLATE, parameters=""):
+    """ Create a local stack """
+    stack_path = workdir / "stacks" / name
+    stack_path.mkdir(parents=True)
+    (stack_path / "template.yaml").write_text(template, encoding="utf-8")
+    if parameters:
+        (stack_path / "parameters.yaml").write_text(parameters, encoding="utf-8")
+
+
+def sync_unused(*args, **kwargs):
+    """ Stand-in for the synchronous client, which must not be used with --async """
+    raise AssertionError("synchronous client used with --async: %s %s" % (args, kwargs))
+
+
+def test_dump_async(backend, workdir, monkeypatch, caplog):
+    """ dump --async fetches templates and parameters of all stacks at once """
+    backend.add_stack(REGION, "app", parameters={"Env": "prod"})
+    monkeypatch.setattr(dump, "RemoteStack", sync_unused)
+
+    with pytest.raises(SystemExit) as exit_info:
+        dump.cmd_dump(async_args(all=False, stack=["app", "missing"], force=False, jobs=2))
+
+    assert exit_info.value.code == 1
+    assert "Failed to dump 1 stack(s): missing" in caplog.text
+    assert (workdir / "stacks" / "app" / "template.yaml").read_text(encoding="utf-8") == \
+        TEMPLATE
+    assert "Env: prod" in (workdir / "stacks" / "app" / "parameters.yaml").read_text(
+        encoding="utf-8")
+    assert {operation for _, operation, _ in backend.requests} == \
+        {"get_template", "describe_stacks"}
+
+
+def test_status_async(backend, workdir, monkeypatch, capsys):
+    """ status --async fetches the templates of all stacks at once """
+    backend.add_stack(REGION, "app", parameters={"Env": "prod"})
+    backend.add_stack(REGION, "changed", template=TEMPLATE.replace("Topic", "Queue"))
+    write_stack(workdir, "app", parameters="Env: prod\n")
+    write_stack(workdir, "changed")
+    write_stack(workdir, "local")
+
+    cfn = SimpleNamespace(profile=None, client=SimpleNamespace(meta=SimpleNamespace(
+        region_name=REGION)), iter_stacks=lambda: list(backend.stacks[REGION].values()),
+                          get_template=sync_unused)
+    monkeypatch.setattr(status, "CloudFormation", lambda region, profile: cfn)
+
+    status.cmd_status(async_args(stack=[], jobs=2, no_cache=False))
+
+    rows = [" ".join(line.split()) for line in capsys.readouterr().out.splitlines()[2:]]
+    assert rows == ["app CREATE_COMPLETE " + status.IN_SYNC,
+                    "changed CREATE_COMPLETE template",
+                    "local " + status.NOT_DEPLOYED]
+    assert sorted(kwargs["StackName"] for _, operation, kwargs in backend.requests
+                  if operation == "get_template") == ["app", "changed"]
+
+
+def test_validate_async(backend, workdir, monkeypatch, caplog):
+    """ validate --async sends all templates at once """
+    write_stack(workdir, "valid")
+    write_stack(workdir, "invalid", template="Description: Invalid\n" + TEMPLATE)
+    monkeypatch.setattr(validate, "CloudFormation", lambda region, profile: SimpleNamespace(
+        validate=sync_unused))
+    caplog.set_level(logging.INFO)
+
+    with pytest.raises(SystemExit) as exit_info:
+        validate.cmd_validate(async_args(stack=[], all=True, jobs=2, no_cache=True))
+
+    assert exit_info.value.code == 1
+    assert "Validated stack valid" in caplog.text
+    assert "Failed to validate 1 stack(s): invalid" in caplog.text
+    assert [operation for _, operation, _ in backend.requests] == ["validate_template"] * 2
+
+
+def test_list_async(backend, workdir, caplog, capsys):  # pylint: disable=unused-argument
+    """ list --async lists the stacks of all regions at once, failed regions are logged """
+    backend.add_stack(REGION, "app")
+    backend.add_stack("us-east-1", "other")
+    backend.denied.add("ap-east-1")
+
+    list_cmd.cmd_list(async_args(region="%s,us-east-1,ap-east-1" % REGION, local=False,
+                                 remote=True, json=False, cached=False, max_age=None))
+
+    rows = [line.split() for line in capsys.readouterr().out.splitlines()[2:]]
+    assert rows == [["default", REGION, "app", "CREATE_COMPLETE"],
+                    ["default", "us-east-1", "other", "CREATE_COMPLETE"]]
+    assert "default/ap-east-1: An error occurred (AccessDenied)" in caplog.text
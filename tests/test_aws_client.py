@@ -0,0 +1,66 @@
+""" Tests of the synchronous CloudFormation client """
+
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, time
+
+import pytest
+
+from clouds_aws.remote_stack import aws_client
+
+SWEEP_SECONDS = 0.3
+
+
+class SlowCloudFormation(aws_client.CloudFormation):
+    """ CloudFormation client with a slow stack sweep (no API calls) """
+
+    sweeps = []
+
+    def __init__(self, region):  # pylint: disable=super-init-not-called
+        self.region = region
+        self.profile = None
+
+    def iter_stacks(self):
+        self.sweeps.append(self.region)
+        sleep(SWEEP_SECONDS)
+        yield {"StackName": "stack-" + self.region, "StackStatus": "CREATE_COMPLETE"}
+
+
+@pytest.fixture(autouse=True)
+def fixture_empty_cache(monkeypatch):
+    """ Do not share the stack index cache between tests """
+    monkeypatch.setattr(aws_client, "_STACK_CACHE", {})
+    monkeypatch.setattr(aws_client, "_SWEEP_LOCKS", {}, raising=False)
+    monkeypatch.setattr(SlowCloudFormation, "sweeps", [])
+
+
+def test_sweeps_of_regions_run_concurrently():
+    """ Sweeps of different regions do not wait for each other """
+    regions = ["eu-west-1", "eu-central-1", "us-east-1", "us-west-2"]
+
+    start = time()
+    with ThreadPoolExecutor(max_workers=len(regions)) as executor:
+        results = list(executor.map(lambda region: SlowCloudFormation(region).list_stacks(),
+                                    regions))
+
+    assert time() - start < SWEEP_SECONDS * 2
+    assert results == [{"stack-" + region: "CREATE_COMPLETE"} for region in regions]
+
+
+def test_concurrent_sweeps_of_a_region_shared():
+    """ Callers listing the same region at the same time share one sweep """
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: SlowCloudFormation("eu-west-1").list_stacks(),
+                                    range(4)))
+
+    assert SlowCloudFormation.sweeps == ["eu-west-1"]
+    assert all(result == {"stack-eu-west-1": "CREATE_COMPLETE"} for result in results)
+
+
+def test_refresh_sweeps_again():
+    """ refresh ignores the cached index """
+    client = SlowCloudFormation("eu-west-1")
+    client.list_stacks()
+    client.list_stacks()
+    client.list_stacks(refresh=True)
+
+    assert SlowCloudFormation.sweeps == ["eu-west-1", "eu-west-1"]
@@ -0,0 +1,27 @@
+""" Tests of the describe command """
+
+import logging
+from argparse import Namespace
+
+from clouds_aws.cli import describe
+from clouds_aws.remote_stack.aws_client import CloudFormationError
+
+STACK_DATA = {"Parameters": {}, "Outputs": {}, "Resources": {}}
+
+
+def test_fan_out_errors_logged_by_kind(monkeypatch, caplog):
+    """ Missing stacks are logged as info, other errors as warning """
+    def fan_out(args, func):  # pylint: disable=unused-argument
+        yield None, "eu-west-1", STACK_DATA, None
+        yield None, "us-east-1", None, CloudFormationError("Stack with id app does not exist")
+        yield None, "ap-east-1", None, CloudFormationError("The security token is invalid")
+
+    monkeypatch.setattr(describe, "fan_out", fan_out)
+    caplog.set_level(logging.INFO)
+
+    assert describe.describe_targets(Namespace(stack="app")) == \
+        [((None, "eu-west-1"), STACK_DATA)]
+    assert [(record.levelno, record.getMessage()) for record in caplog.records] == [
+        (logging.INFO, "None/us-east-1: Stack with id app does not exist"),
+        (logging.WARNING, "None/ap-east-1: The security token is invalid"),
+    ]
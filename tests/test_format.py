@@ -0,0 +1,52 @@
+""" Tests of the format command """
+
+import json
+import logging
+from argparse import Namespace
+
+import pytest
+
+from clouds_aws.cli import format as format_cmd
+
+TEMPLATE = {"Resources": {"Topic": {"Type": "AWS::SNS::Topic"}}}
+
+
+@pytest.fixture(name="stacks")
+def fixture_stacks(tmp_path, monkeypatch):
+    """ Create an unformatted stack and one with a malformed parameters file """
+    monkeypatch.chdir(tmp_path)
+
+    for name in ("broken", "unformatted"):
+        stack_path = tmp_path / "stacks" / name
+        stack_path.mkdir(parents=True)
+        (stack_path / "template.json").write_text(json.dumps(TEMPLATE), encoding="utf-8")
+
+    (tmp_path / "stacks" / "broken" / "parameters.yaml").write_text("Key: [unclosed\n",
+                                                                   encoding="utf-8")
+    return tmp_path / "stacks"
+
+
+def test_reformat_stack_malformed_parameters(stacks):
+    """ A malformed parameters file is returned as error, the template is left alone """
+    changed, error = format_cmd.reformat_stack("broken")
+
+    assert not changed
+    assert "Failed to load stack parameters" in error
+    assert (stacks / "broken" / "template.json").read_text(encoding="utf-8") == \
+        json.dumps(TEMPLATE)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_format_all_continues_after_malformed_parameters(stacks, caplog, jobs):
+    """ A stack that fails to load does not abort reformatting the others """
+    args = Namespace(stack=[], all=True, check=False, jobs=jobs, pipe=False)
+    caplog.set_level(logging.INFO)
+
+    with pytest.raises(SystemExit) as exit_info:
+        format_cmd.cmd_reformat(args)
+
+    assert exit_info.value.code == 1
+    assert "Cannot reformat stack broken" in caplog.text
+    assert "Reformatted stack unformatted" in caplog.text
+    assert (stacks / "unformatted" / "template.json").read_text(encoding="utf-8") != \
+        json.dumps(TEMPLATE)
@@ -0,0 +1,59 @@
+""" Tests of the single pass encoder against the previous dump_json output """
+
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from clouds_aws.local_stack import json_encoder
+from clouds_aws.local_stack.helpers import dump_json, write_json
+
+# templates (*.json) and their text as rendered by the regular expressions (*.expected)
+CORPUS = sorted((Path(__file__).parent / "json_encoder").glob("*.json"))
+
+
+def load_case(path):
+    """ Return template and expected text of a corpus entry """
+    template = json.loads(path.read_text(encoding="utf-8"))
+    expected = path.with_suffix(".expected").read_text(encoding="utf-8")
+    return template, expected
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=[path.stem for path in CORPUS])
+def test_encode(path):
+    """ encode renders the same text as the regular expressions """
+    template, expected = load_case(path)
+
+    assert json_encoder.encode(template) == expected
+    assert dump_json(template) == expected
+
+
+@pytest.mark.parametrize("depth", [0, 1, json_encoder.STREAM_DEPTH, 5])
+@pytest.mark.parametrize("path", CORPUS, ids=[path.stem for path in CORPUS])
+def test_iterencode(path, depth):
+    """ The pieces of iterencode join to the same text on any streaming depth """
+    template, expected = load_case(path)
+
+    assert "".join(json_encoder.iterencode(template, depth)) == expected
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=[path.stem for path in CORPUS])
+def test_write_json(path, monkeypatch):
+    """ Buffered writes produce the same text """
+    template, expected = load_case(path)
+    stream = StringIO()
+    monkeypatch.setattr("clouds_aws.local_stack.helpers.WRITE_BUFFER_SIZE", 16)
+
+    write_json(template, stream)
+
+    assert stream.getvalue() == expected
+
+
+def test_corpus_covers_cases():
+    """ The corpus includes unicode, floats, empty containers and irregular nodes """
+    text = "".join(path.with_suffix(".expected").read_text(encoding="utf-8") for path in CORPUS)
+
+    for piece in ('"\\u00dc', '"\\ud83d\\ude80', "1e+100", "0.1,", "[]", "{}", '""',
+                  '{ "Fn::Select": [ "2", {\n'):
+        assert piece in text
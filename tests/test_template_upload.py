@@ -0,0 +1,116 @@
+""" Tests of the upload of templates too large to be sent inline """
+
+from hashlib import sha256
+
+import boto3
+import pytest
+
+moto = pytest.importorskip("moto")
+
+from clouds_aws.remote_stack import sessions, template_upload  # pylint: disable=wrong-import-position
+
+REGION = "eu-west-1"
+BUCKET = "templates"
+
+
+@pytest.fixture(name="s3_client")
+def fixture_s3_client(monkeypatch):
+    """
+    Return S3 client of a mocked account with an empty bucket
+    Sessions, clients and uploaded objects are not shared between tests.
+    """
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    monkeypatch.delenv("AWS_ENDPOINT_URL_S3", raising=False)
+    monkeypatch.setattr(sessions, "_SESSIONS", {})
+    monkeypatch.setattr(sessions, "_CLIENTS", {})
+    monkeypatch.setattr(template_upload, "_UPLOADED", set())
+    monkeypatch.setattr(template_upload, "_SETTINGS", dict(template_upload._SETTINGS))  # pylint: disable=protected-access
+
+    with moto.mock_aws():
+        client = sessions.get_client("s3", REGION, None)
+        client.create_bucket(Bucket=BUCKET,
+                             CreateBucketConfiguration={"LocationConstraint": REGION})
+        yield client
+
+
+def large_template():
+    """ Return template just above the inline limit """
+    return '{"Description": "%s"}' % ("x" * template_upload.TEMPLATE_BODY_LIMIT)
+
+
+def test_inline_up_to_limit(s3_client):
+    """ Templates up to the limit are sent inline, even if a bucket is configured """
+    template_upload.configure(BUCKET)
+    body = "x" * template_upload.TEMPLATE_BODY_LIMIT
+
+    assert template_upload.template_source(body, REGION, None) == {"TemplateBody": body}
+    assert s3_client.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 0
+
+
+def test_inline_without_bucket(s3_client):
+    """ Large templates are sent inline (and rejected by the API) without a bucket """
+    template_upload.configure(None)
+    body = large_template()
+
+    assert template_upload.template_source(body, REGION, None) == {"TemplateBody": body}
+    assert s3_client.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 0
+
+
+def test_upload_above_limit(s3_client):
+    """ Large templates are uploaded named by their digest and passed by URL """
+    template_upload.configure(BUCKET, "/prefix/")
+    body = large_template()
+    key = "prefix/%s.template" % sha256(body.encode("utf-8")).hexdigest()
+
+    source = template_upload.template_source(body, REGION, None)
+
+    assert source == {"TemplateURL": "https://%s.s3.%s.amazonaws.com/%s" % (BUCKET, REGION, key)}
+    stored = s3_client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+    assert stored.decode("utf-8") == body
+
+
+def test_existing_object_reused(s3_client, monkeypatch):
+    """ Objects found by head_object are not uploaded again (e.g. by an earlier run) """
+    template_upload.configure(BUCKET)
+    body = large_template()
+    first = template_upload.template_source(body, REGION, None)
+
+    # forget the objects uploaded by this process, like a new run would
+    monkeypatch.setattr(template_upload, "_UPLOADED", set())
+    uploads = []
+    monkeypatch.setattr(s3_client, "put_object", lambda **kwargs: uploads.append(kwargs))
+
+    assert template_upload.template_source(body, REGION, None) == first
+    assert not uploads
+
+
+def test_changed_template_uploaded(s3_client):
+    """ A changed template gets a new key """
+    template_upload.configure(BUCKET)
+    first = template_upload.template_source(large_template(), REGION, None)
+    second = template_upload.template_source(large_template() + " ", REGION, None)
+
+    assert first != second
+    assert s3_client.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 2
+
+
+def test_reject_above_url_limit(s3_client):
+    """ Templates CloudFormation does not accept by URL either are not uploaded """
+    template_upload.configure(BUCKET)
+    body = "x" * (template_upload.TEMPLATE_URL_LIMIT + 1)
+
+    with pytest.raises(template_upload.TemplateSizeError, match="more than CloudFormation"):
+        template_upload.template_source(body, REGION, None)
+
+    assert s3_client.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 0
+
+
+def test_path_style_url_for_custom_endpoint():
+    """ Custom endpoints (e.g. a local S3 stand-in) are addressed path style """
+    client = boto3.client("s3", region_name=REGION, endpoint_url="http://localhost:5000/",
+                          aws_access_key_id="testing", aws_secret_access_key="testing")
+
+    assert template_upload.template_url(client, BUCKET, "prefix/a b.template") == \
+        "http://localhost:5000/templates/prefix/a%20b.template"
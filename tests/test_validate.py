@@ -0,0 +1,64 @@
+""" Tests of the validate command """
+
+import logging
+from argparse import Namespace
+
+import pytest
+
+from clouds_aws.cli import validate
+from clouds_aws.local_stack import LocalStack, LocalStackError
+
+TEMPLATE = "Resources:\n  Topic:\n    Type: AWS::SNS::Topic\n"
+
+
+class FakeCloudFormation:  # pylint: disable=too-few-public-methods
+    """ CloudFormation client accepting every template """
+
+    validated = []
+
+    def __init__(self, region, profile):
+        self.region = region
+        self.profile = profile
+
+    def validate(self, tpl_body):
+        """ Record validated template """
+        self.validated.append(tpl_body)
+
+
+@pytest.fixture(name="stacks")
+def fixture_stacks(tmp_path, monkeypatch):
+    """ Create a valid stack and a stack with a malformed parameters file """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(validate, "CloudFormation", FakeCloudFormation)
+    monkeypatch.setattr(FakeCloudFormation, "validated", [])
+
+    for name in ("broken", "valid"):
+        stack_path = tmp_path / "stacks" / name
+        stack_path.mkdir(parents=True)
+        (stack_path / "template.yaml").write_text(TEMPLATE, encoding="utf-8")
+
+    (tmp_path / "stacks" / "broken" / "parameters.yaml").write_text("Key: [unclosed\n",
+                                                                   encoding="utf-8")
+    return tmp_path
+
+
+def test_malformed_parameters_raise_local_stack_error(stacks):  # pylint: disable=unused-argument
+    """ YAML errors of the parameters file are reported like other stack errors """
+    with pytest.raises(LocalStackError, match="parameters"):
+        LocalStack("broken", round_trip=False).load()
+
+
+def test_validate_all_continues_after_malformed_parameters(stacks, caplog):  # pylint: disable=unused-argument
+    """ A stack that fails to load does not abort validating the others """
+    args = Namespace(stack=[], all=True, jobs=2, no_cache=True, use_async=False,
+                     region="eu-west-1", profile=None)
+    caplog.set_level(logging.INFO)
+
+    with pytest.raises(SystemExit) as exit_info:
+        validate.cmd_validate(args)
+
+    assert exit_info.value.code == 1
+    assert FakeCloudFormation.validated == [TEMPLATE]
+    assert "Validated stack valid" in caplog.text
+    assert "Failed to validate 1 stack(s): broken" in caplog.text
@@ -0,0 +1,65 @@
+""" Tests of the compact wire format of templates """
+
+import json
+
+import pytest
+
+from clouds_aws.local_stack.diff import normalize, parse_template
+from clouds_aws.remote_stack.wire_format import minify
+
+SUBNET = """\
+  Subnet{index}:
+    Type: AWS::EC2::Subnet
+    Properties:
+      VpcId: !Ref VpcId
+      AvailabilityZone: !Select [{index}, !GetAZs ""]
+      CidrBlock: !Select [{index}, !Cidr [10.0.0.0/16, 4, 8]]
+      MapPublicIpOnLaunch: false
+      Tags:
+        - Key: Name
+          Value: !Sub "${{AWS::StackName}}-subnet-{index}"
+        - Key: Tier
+          Value: private
+"""
+
+SELECT_TEMPLATE = """\
+AWSTemplateFormatVersion: 2010-09-09
+Description: Subnets in the availability zones
+Parameters:
+  VpcId:
+    Type: AWS::EC2::VPC::Id
+Resources:
+""" + "".join(SUBNET.format(index=index) for index in range(3)) + """\
+Outputs:
+  Subnet0:
+    Value: !GetAtt Subnet0.SubnetId
+"""
+
+
+def test_select_zero_minified():
+    """ The common !Select [0, ...] idiom is converted (0 is loaded as ScalarInt) """
+    compact = minify(SELECT_TEMPLATE)
+
+    assert len(compact) < len(SELECT_TEMPLATE)
+    tree = json.loads(compact)
+    assert tree == normalize(parse_template(SELECT_TEMPLATE))
+    assert tree["Resources"]["Subnet0"]["Properties"]["AvailabilityZone"] == \
+        {"Fn::Select": [0, {"Fn::GetAZs": ""}]}
+
+
+def test_json_whitespace_removed():
+    """ JSON templates only lose their whitespace """
+    template = '{\n  "Resources": {\n    "Topic": {"Type": "AWS::SNS::Topic",' \
+               ' "Properties": {"TopicName": "a b"}}\n  }\n}\n'
+
+    assert minify(template) == '{"Resources":{"Topic":{"Type":"AWS::SNS::Topic",' \
+                               '"Properties":{"TopicName":"a b"}}}}'
+
+
+@pytest.mark.parametrize("value", ["010", "0o10", "yes", "off", "1:30", "!Unknown x"])
+def test_ambiguous_yaml_unchanged(value):
+    """ Values CloudFormation (YAML 1.1) reads differently are sent as they are """
+    template = "Resources:\n  Topic:\n    Type: AWS::SNS::Topic\n    Properties:\n" \
+               "      TopicName: %s\n      DisplayName: some display name\n" % value
+
+    assert minify(template) == template